@@ -1,34 +1,159 @@
 """Contains configuration on how to show all models in admin page."""
 
+import csv
+
 from django.contrib import admin
-from .models import User, Auction, Bid, Comment, Watchlist
+from django.core.paginator import Paginator
+from django.db import connection, transaction
+from django.db.models import Max
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .models import User, Auction, Bid, Comment, Watchlist, BidRollup
+from .notifications import enqueue_auctions_closed
 
 # Register your models here.
 
+# ----------------------------------------------------------------------
+# ----------------------------  Helpers  -------------------------------
+# ----------------------------------------------------------------------
+class EstimatedCountPaginator(Paginator):
+    """Paginator that avoids full COUNT(*) on unfiltered big tables.
+
+    Uses planner statistics: pg_class on PostgreSQL, sqlite_stat1 on SQLite
+    (both refreshed by ANALYZE - see archive command). Statistics follow
+    deleted rows, unlike the highest primary key, which is used only if
+    no statistics were gathered yet. Filtered changelists are counted exactly.
+    """
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        if query.where:
+            return super().count
+
+        estimate = table_statistics(query.model._meta.db_table)
+        if estimate is not None:
+            return estimate
+
+        return query.model.objects.aggregate(max_id=Max("pk"))["max_id"] or 0
+
+def table_statistics(table):
+    """Returns number of rows in table according to planner statistics
+    or None if there are no statistics."""
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT reltuples FROM pg_class WHERE relname = %s", [table])
+        elif connection.vendor == "sqlite":
+            # Table exists only after first ANALYZE
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            # Stat column starts with number of rows in the table
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table])
+        else:
+            return None
+        row = cursor.fetchone()
+
+    if not row:
+        return None
+    estimate = int(float(str(row[0]).split()[0]))
+    return estimate if estimate > 0 else None
+
+class Echo:
+    """File-like object that returns written value - used to stream CSV."""
+    def write(self, value):
+        return value
+
+def _with_header(header, rows):
+    yield header
+    yield from rows
+
+def export_as_csv(modeladmin, request, queryset):
+    """Admin action: streams selected rows as CSV file."""
+    fields = [field.attname for field in modeladmin.model._meta.concrete_fields]
+    writer = csv.writer(Echo())
+
+    rows = queryset.values_list(*fields).order_by("pk").iterator(chunk_size=2000)
+    response = StreamingHttpResponse(
+        (writer.writerow(row) for row in _with_header(fields, rows)),
+        content_type="text/csv"
+    )
+    response["Content-Disposition"] = f"attachment; filename={modeladmin.model._meta.model_name}.csv"
+    return response
+export_as_csv.short_description = "Export selected as CSV"
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Base admin for tables that can grow to millions of rows."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+    actions = [export_as_csv]
+
+# ----------------------------------------------------------------------
+# ----------------------------  Admins  --------------------------------
+# ----------------------------------------------------------------------
 # User table - visible columns for admin view
 class UserAdmin(admin.ModelAdmin):
     """Contains User model admin page config"""
     list_display = ("id", "username", "email", "password")
+    search_fields = ("username", "email")
 
-class AuctionAdmin(admin.ModelAdmin):
+class AuctionAdmin(LargeTableAdmin):
     """Contains Auction model admin page config"""
     list_display = ("id", "title", "category", "current_price",
                     "publication_date", "closed", "seller")
+    list_select_related = ("seller",)
+    list_filter = ("closed", "category")
+    search_fields = ("title",)
+    autocomplete_fields = ("seller",)
+    date_hierarchy = "publication_date"
+    actions = [export_as_csv, "close_auctions"]
+
+    def close_auctions(self, request, queryset):
+        """Admin action: closes all selected auctions with one UPDATE
+        and lets their watchers know with one insert."""
+        with transaction.atomic():
+            auctions = list(queryset.filter(closed=False).select_related(None)
+                                    .select_for_update().only("id", "title"))
+            closed = Auction.objects.filter(id__in=[auction.id for auction in auctions]).update(
+                closed=True, closed_date=timezone.now()
+            )
+            enqueue_auctions_closed(auctions)
+        self.message_user(request, f"{closed} auction(s) closed.")
+    close_auctions.short_description = "Close selected auctions"
 
-class BidAdmin(admin.ModelAdmin):
+class BidAdmin(LargeTableAdmin):
     """Contains Bid model admin page config"""
     list_display = ("auction", "user", "bid_price", "bid_date")
+    list_select_related = ("auction__seller", "user")
+    raw_id_fields = ("auction", "user")
+    date_hierarchy = "bid_date"
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     """Contains Comment model admin page config"""
     list_display = ("auction", "user", "comment")
+    list_select_related = ("auction__seller", "user")
+    raw_id_fields = ("auction", "user")
+    date_hierarchy = "comment_date"
 
-class WatchlistAdmin(admin.ModelAdmin):
+class WatchlistAdmin(LargeTableAdmin):
     """Contains Watchlist model admin page config"""
     list_display = ("auction", "user")
+    list_select_related = ("auction__seller", "user")
+    raw_id_fields = ("auction", "user")
+
+class BidRollupAdmin(LargeTableAdmin):
+    """Contains BidRollup model admin page config"""
+    list_display = ("bucket", "resolution", "auction", "category",
+                    "bid_count", "max_price", "unique_bidders")
+    list_select_related = ("auction__seller",)
+    list_filter = ("resolution", "category")
+    raw_id_fields = ("auction",)
 
 admin.site.register(User, UserAdmin)
 admin.site.register(Auction, AuctionAdmin)
 admin.site.register(Bid, BidAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Watchlist, WatchlistAdmin)
+admin.site.register(BidRollup, BidRollupAdmin)
@@ -0,0 +1,100 @@
+"""Contains archival of closed auctions: old closed auctions with their bids
+and comments are moved to archive tables, so hot tables stay small."""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import (Auction, Bid, Comment, ArchivedAuction, ArchivedBid,
+                     ArchivedComment)
+
+
+def archivable(days=None):
+    """Returns closed auctions closed more than given days ago.
+    Auctions closed before close date was recorded are judged by publication date.
+    """
+    if days is None:
+        days = settings.ARCHIVE_AFTER_DAYS
+    threshold = timezone.now() - timedelta(days=days)
+
+    return Auction.objects.filter(closed=True).filter(
+        Q(closed_date__lt=threshold) | Q(closed_date__isnull=True, publication_date__lt=threshold)
+    )
+
+def archive_batch(auction_ids):
+    """Moves given auctions with their bids and comments to archive tables
+    in one transaction. Returns number of archived auctions.
+
+    Archived auctions keep their ids, so bid rollups and inbox notifications
+    that point at them are left in place. Watchlists, proxy bids and
+    similarities are deleted with the auctions, pending notification
+    events lose their auction.
+    """
+    with transaction.atomic():
+        auctions = list(Auction.objects.filter(id__in=auction_ids, closed=True))
+        if not auctions:
+            return 0
+        auction_ids = [auction.id for auction in auctions]
+
+        # Highest bid wins, the earlier one if prices are equal
+        winners = {}
+        bids = Bid.objects.filter(auction__in=auction_ids).order_by("auction", "-bid_price", "bid_date")
+        archived_bids = []
+        for bid in bids.iterator():
+            winners.setdefault(bid.auction_id, bid.user_id)
+            archived_bids.append(ArchivedBid(id=bid.id, auction_id=bid.auction_id, user_id=bid.user_id,
+                                             bid_date=bid.bid_date, bid_price=bid.bid_price))
+
+        ArchivedAuction.objects.bulk_create([
+            ArchivedAuction(
+                id=auction.id,
+                seller_id=auction.seller_id,
+                title=auction.title,
+                description=auction.description,
+                current_price=auction.current_price,
+                category=auction.category,
+                image_url=auction.image_url,
+                publication_date=auction.publication_date,
+                closed_date=auction.closed_date,
+                winner_id=winners.get(auction.id)
+            )
+            for auction in auctions
+        ])
+        ArchivedBid.objects.bulk_create(archived_bids)
+        ArchivedComment.objects.bulk_create([
+            ArchivedComment(id=comment.id, auction_id=comment.auction_id, user_id=comment.user_id,
+                            comment=comment.comment, comment_date=comment.comment_date)
+            for comment in Comment.objects.filter(auction__in=auction_ids).iterator()
+        ])
+
+        # Delete big tables' rows directly, the rest goes with the auctions
+        Bid.objects.filter(auction__in=auction_ids).delete()
+        Comment.objects.filter(auction__in=auction_ids).delete()
+        Auction.objects.filter(id__in=auction_ids).delete()
+
+    return len(auctions)
+
+def update_statistics():
+    """Refreshes planner statistics of hot tables - admin estimates row counts from them."""
+    with connection.cursor() as cursor:
+        for model in (Auction, Bid, Comment):
+            cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
+
+def archive(days=None, batch_size=None):
+    """Archives all archivable auctions in batches. Returns number of archived auctions."""
+    if batch_size is None:
+        batch_size = settings.ARCHIVE_BATCH_SIZE
+
+    archived = 0
+    while True:
+        auction_ids = list(archivable(days).order_by("id").values_list("id", flat=True)[:batch_size])
+        if not auction_ids:
+            break
+        archived += archive_batch(auction_ids)
+
+    if archived:
+        update_statistics()
+    return archived
@@ -0,0 +1,130 @@
+"""Contains bidding engine: places bids and resolves competing proxy bids
+(hidden maximums) in a single transaction."""
+
+from collections import namedtuple
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Auction, Bid, ProxyBid
+from .notifications import enqueue_outbid
+from .timeseries import record_bid
+
+
+class BidError(Exception):
+    """Raised when bid cannot be placed - message is shown to the user."""
+    def __init__(self, message, code=400):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+# Bidder taking part in resolution: the earlier one wins a tie
+Competitor = namedtuple("Competitor", ["user_id", "max_price", "since"])
+
+def _strongest(competitors):
+    """Returns competitors ordered from the winner, one entry per user."""
+    best = {}
+    for competitor in competitors:
+        current = best.get(competitor.user_id)
+        if current is None or (competitor.max_price, -competitor.since.timestamp()) > \
+                              (current.max_price, -current.since.timestamp()):
+            best[competitor.user_id] = competitor
+
+    return sorted(best.values(), key=lambda competitor: (-competitor.max_price, competitor.since))
+
+def place_bid(auction_id, user_id, bid_price, max_price=None):
+    """Locks the auction and places user's bid on it - see resolve_bid.
+    Returns list of saved bids.
+    """
+    with transaction.atomic():
+        # Lock the auction - competing bids are resolved one at a time
+        auction = Auction.objects.select_for_update().get(pk=auction_id)
+        return resolve_bid(auction, user_id, bid_price, max_price)
+
+def resolve_bid(auction, user_id, bid_price, max_price=None):
+    """Places user's bid on already locked auction and optionally stores
+    user's hidden maximum, then resolves it against the other proxies.
+
+    Only the two strongest proxies can affect the outcome, so they are read
+    through (auction, -max_price, created) index - O(log n) in the number of
+    proxies. The winner pays one increment over the runner-up, capped at the
+    winner's maximum. At most two visible bids are saved: the runner-up's
+    maximum (if it beats the previous price) and the winning bid.
+    Returns list of saved bids.
+    """
+    increment = Decimal(str(settings.PROXY_BID_INCREMENT))
+    bid_price = Decimal(bid_price)
+
+    # Make sure that prices are valid
+    if bid_price <= 0:
+        raise BidError("Bid price must be greater than 0")
+    if max_price is not None and max_price < bid_price:
+        raise BidError("Maximum bid cannot be lower than the bid")
+
+    with transaction.atomic():
+        if auction.closed:
+            raise BidError("Auction is closed")
+        if auction.seller_id == user_id:
+            raise BidError("Seller cannot bid")
+
+        highest_bid = Bid.objects.filter(auction=auction).order_by("-bid_price", "bid_date").first()
+        previous_price = highest_bid.bid_price if highest_bid is not None else Decimal(0)
+        if highest_bid is not None and bid_price <= previous_price:
+            raise BidError("Youre bid is too small")
+
+        now = timezone.now()
+        if max_price is not None:
+            # Changed maximum counts as placed now - it cannot win ties with an older date
+            proxy = ProxyBid.objects.filter(auction=auction, user_id=user_id).first()
+            if proxy is None:
+                ProxyBid.objects.create(auction=auction, user_id=user_id, max_price=max_price)
+            elif proxy.max_price != max_price:
+                proxy.max_price = max_price
+                proxy.created = now
+                proxy.save(update_fields=["max_price", "created"])
+
+        competitors = [Competitor(user_id, max_price or bid_price, now)]
+        if highest_bid is not None:
+            competitors.append(Competitor(highest_bid.user_id, previous_price, highest_bid.bid_date))
+        for proxy in ProxyBid.objects.filter(auction=auction).order_by("-max_price", "created")[:2]:
+            competitors.append(Competitor(proxy.user_id, proxy.max_price, proxy.created))
+
+        ranking = _strongest(competitors)
+        winner = ranking[0]
+        runner_up = ranking[1] if len(ranking) > 1 else None
+
+        # Winner pays one increment more than the runner-up could
+        if runner_up is not None:
+            price = min(winner.max_price, runner_up.max_price + increment)
+        else:
+            price = bid_price
+        if winner.user_id == user_id:
+            price = max(price, bid_price)
+
+        new_bids = []
+        if runner_up is not None and previous_price < runner_up.max_price < price:
+            new_bids.append(Bid(auction=auction, user_id=runner_up.user_id, bid_price=runner_up.max_price))
+        new_bids.append(Bid(auction=auction, user_id=winner.user_id, bid_price=price))
+
+        for new_bid in new_bids:
+            new_bid.save()
+            # Update bid activity time-series
+            record_bid(new_bid, auction.category)
+
+        # Update current highest price once
+        auction.current_price = price
+        auction.save(update_fields=["current_price"])
+
+        # Proxies below current price can never win again
+        ProxyBid.objects.filter(auction=auction, max_price__lt=price).delete()
+
+        # Let everyone who lost the lead know - delivered later by workers
+        outbid = {competitor.user_id for competitor in ranking[1:]} - {winner.user_id}
+        if highest_bid is not None and highest_bid.user_id != winner.user_id:
+            outbid.add(highest_bid.user_id)
+        if outbid:
+            enqueue_outbid(auction, outbid, price)
+
+    return new_bids
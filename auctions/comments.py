@@ -0,0 +1,199 @@
+"""Contains comment helpers: keyset pagination, per-user rate limiting
+and an optional buffered writer for comment inserts."""
+
+import atexit
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.formats import date_format
+
+from .models import Comment
+
+# ----------------------------------------------------------------------
+# ----------------------------  Pagination  ----------------------------
+# ----------------------------------------------------------------------
+def encode_cursor(comment):
+    """Returns cursor pointing right after given comment."""
+    return f"{comment.comment_date.isoformat()}_{comment.id}"
+
+def decode_cursor(cursor):
+    """Returns (comment_date, id) pair from cursor or None if cursor is invalid."""
+    try:
+        date, comment_id = cursor.rsplit("_", 1)
+        date = parse_datetime(date)
+        comment_id = int(comment_id)
+    except (AttributeError, ValueError):
+        return None
+
+    if date is None:
+        return None
+    return date, comment_id
+
+def get_comments_page(auction_id, cursor=None, page_size=None, user_id=None):
+    """Returns one page of auction's comments ordered by (comment_date, id)
+    and cursor for the next page (None if it is the last page).
+    Given user sees own comments still waiting in this worker's buffer.
+    """
+    if page_size is None:
+        page_size = settings.COMMENT_PAGE_SIZE
+
+    if user_id is not None:
+        comment_buffer.flush_if_pending(user_id)
+
+    comments = (Comment.objects.filter(auction=auction_id)
+                               .select_related("user")
+                               .order_by("comment_date", "id"))
+
+    # Seek past the last comment seen instead of using OFFSET
+    if cursor is not None:
+        date, comment_id = cursor
+        comments = comments.filter(Q(comment_date__gt=date) | Q(comment_date=date, id__gt=comment_id))
+
+    # Fetch one extra row to know if there is a next page
+    comments = list(comments[:page_size + 1])
+    if len(comments) > page_size:
+        comments = comments[:page_size]
+        return comments, encode_cursor(comments[-1])
+
+    return comments, None
+
+def serialize_comment(comment):
+    """Returns comment as dict, formatted the same way as in listing page."""
+    return {
+        "comment": comment.comment,
+        "username": comment.user.username,
+        "comment_date": date_format(timezone.localtime(comment.comment_date), "DATETIME_FORMAT")
+    }
+
+# ----------------------------------------------------------------------
+# ---------------------------  Rate limiting  --------------------------
+# ----------------------------------------------------------------------
+# Bucket lock: expires on its own if the worker dies while holding it
+COMMENT_LOCK_TIMEOUT = 2
+COMMENT_LOCK_ATTEMPTS = 20
+COMMENT_LOCK_WAIT = 0.005
+
+def allow_comment(user_id):
+    """Token bucket kept in cache: returns True if user can post a comment now.
+
+    Bucket holds up to COMMENT_RATE_BURST tokens and is refilled with
+    COMMENT_RATE_PER_MINUTE tokens per minute. Each comment takes one token.
+    Read-modify-write of the bucket is guarded by a lock taken with atomic
+    cache.add, so the cache must be shared by all workers (see CACHES).
+    If the lock cannot be taken in time the comment is refused.
+    """
+    capacity = settings.COMMENT_RATE_BURST
+    refill_rate = settings.COMMENT_RATE_PER_MINUTE / 60
+    key = f"comment_bucket:{user_id}"
+    lock_key = f"{key}:lock"
+
+    for _ in range(COMMENT_LOCK_ATTEMPTS):
+        if cache.add(lock_key, True, COMMENT_LOCK_TIMEOUT):
+            break
+        time.sleep(COMMENT_LOCK_WAIT)
+    else:
+        return False
+
+    try:
+        now = time.time()
+        tokens, last_update = cache.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - last_update) * refill_rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+
+        # Keep bucket only as long as it takes to refill completely
+        timeout = int(capacity / refill_rate) + 1 if refill_rate else None
+        cache.set(key, (tokens, now), timeout)
+    finally:
+        cache.delete(lock_key)
+
+    return allowed
+
+# ----------------------------------------------------------------------
+# --------------------------  Buffered writer  -------------------------
+# ----------------------------------------------------------------------
+class CommentBuffer:
+    """Collects comments in memory and saves them with one bulk insert
+    when buffer is full or the oldest comment waits max_age seconds.
+    Size and max age not given are read from settings on every use.
+
+    Buffered comments live only in this process - they are saved on normal
+    exit, but lost if the worker is killed (SIGKILL, OOM, timeout).
+    """
+    def __init__(self, size=None, max_age=None):
+        self._size = size
+        self._max_age = max_age
+        self._comments = []
+        self._timer = None
+        self._lock = threading.Lock()
+
+    @property
+    def size(self):
+        return self._size if self._size is not None else settings.COMMENT_BUFFER_SIZE
+
+    @property
+    def max_age(self):
+        return self._max_age if self._max_age is not None else settings.COMMENT_BUFFER_MAX_AGE
+
+    def add(self, comment):
+        """Adds comment to buffer and flushes it if it is full."""
+        with self._lock:
+            self._comments.append(comment)
+            if len(self._comments) < self.size:
+                # First comment in buffer - flush it in max_age seconds at the latest
+                if self._timer is None:
+                    self._timer = threading.Timer(self.max_age, self._flush_on_timer)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+            comments = self._take()
+
+        Comment.objects.bulk_create(comments)
+
+    def flush(self):
+        """Saves all buffered comments."""
+        with self._lock:
+            comments = self._take()
+
+        if comments:
+            Comment.objects.bulk_create(comments)
+
+    def flush_if_pending(self, user_id):
+        """Saves all buffered comments if any of them is given user's."""
+        with self._lock:
+            pending = any(comment.user_id == user_id for comment in self._comments)
+        if pending:
+            self.flush()
+
+    def _take(self):
+        """Empties buffer and cancels pending timer - call with lock held."""
+        comments, self._comments = self._comments, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return comments
+
+    def _flush_on_timer(self):
+        try:
+            self.flush()
+        finally:
+            # Timer thread has its own database connection
+            connection.close()
+
+comment_buffer = CommentBuffer()
+atexit.register(comment_buffer.flush)
+
+def save_comment(comment):
+    """Saves comment directly or through buffer if buffering is enabled."""
+    if comment_buffer.size > 1:
+        comment_buffer.add(comment)
+    else:
+        comment.save()
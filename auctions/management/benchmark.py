@@ -0,0 +1,28 @@
+"""Contains helpers shared by benchmark commands: rolled back data and test client."""
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import transaction
+from django.test import Client
+
+
+class Rollback(Exception):
+    """Raised to roll back all benchmark data."""
+
+
+@contextmanager
+def rolled_back():
+    """Runs the block in a transaction that is always rolled back."""
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+def logged_in_client(user):
+    """Returns test client logged in as given user, sending allowed host."""
+    host = settings.ALLOWED_HOSTS[0] if settings.ALLOWED_HOSTS else "localhost"
+    client = Client(HTTP_HOST=host)
+    client.force_login(user)
+    return client
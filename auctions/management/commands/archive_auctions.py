@@ -0,0 +1,18 @@
+"""Contains command that moves old closed auctions to archive tables."""
+from django.core.management.base import BaseCommand
+
+from auctions.archive import archive
+
+
+class Command(BaseCommand):
+    help = "Moves closed auctions older than a threshold, with their bids and comments, to archive tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=None,
+                            help="Archive auctions closed more than that many days ago.")
+        parser.add_argument("--batch-size", type=int, default=None,
+                            help="Number of auctions moved in one transaction.")
+
+    def handle(self, *args, **options):
+        archived = archive(options["days"], options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} auction(s)."))
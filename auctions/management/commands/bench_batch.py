@@ -0,0 +1,57 @@
+"""Contains command that compares single bid requests with one batch request."""
+import json
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from auctions.management.benchmark import logged_in_client, rolled_back
+from auctions.models import User, Auction
+
+
+class Command(BaseCommand):
+    help = ("Times N single bid requests (each followed by the listing page it redirects to) "
+            "against one batch request with N bids. All created data is rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--operations", type=int, default=100,
+                            help="Number of bids.")
+
+    def handle(self, *args, **options):
+        count = options["operations"]
+
+        with rolled_back():
+            seller = User.objects.create_user("bench_seller")
+            bidder = User.objects.create_user("bench_bidder")
+            Auction.objects.bulk_create([
+                Auction(seller=seller, title=f"Benchmark {index}") for index in range(2 * count)
+            ])
+            auction_ids = list(Auction.objects.filter(seller=seller).order_by("id").values_list("id", flat=True))
+
+            client = logged_in_client(bidder)
+
+            # Single requests: POST and the redirected listing page
+            start = time.perf_counter()
+            for auction_id in auction_ids[:count]:
+                client.post(reverse("auctions:bid"), {"bid_price": "10.00", "auction_id": auction_id},
+                            follow=True)
+            single = time.perf_counter() - start
+
+            # One batch request with the same number of bids on other auctions
+            body = json.dumps({"operations": [
+                {"auction_id": auction_id, "bid_price": "10.00"} for auction_id in auction_ids[count:]
+            ]})
+            start = time.perf_counter()
+            response = client.post(reverse("auctions:batch_bid"), body, content_type="application/json")
+            batch = time.perf_counter() - start
+
+            placed = sum(result["ok"] for result in response.json()["results"])
+            prices = Auction.objects.filter(seller=seller, current_price=Decimal("10.00")).count()
+
+        self.stdout.write(f"{count} single requests: {single * 1000:.0f} ms "
+                          f"({single / count * 1000:.1f} ms per bid)")
+        self.stdout.write(f"1 batch request:      {batch * 1000:.0f} ms "
+                          f"({batch / count * 1000:.1f} ms per bid, {placed} placed)")
+        self.stdout.write(self.style.SUCCESS(f"Batch is {single / batch:.1f}x faster "
+                                             f"({prices} of {2 * count} auctions updated)."))
@@ -0,0 +1,59 @@
+"""Contains command that measures bid request latency with and without notification events."""
+import statistics
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from auctions.bidding import place_bid
+from auctions.management.benchmark import logged_in_client, rolled_back
+from auctions.models import User, Auction, NotificationEvent
+
+
+class Command(BaseCommand):
+    help = ("Times bid requests that outbid another user, once with outbid events enqueued "
+            "and once with enqueueing disabled. All created data is rolled back.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200,
+                            help="Number of bid requests in every run.")
+        parser.add_argument("--runs", type=int, default=5,
+                            help="Number of runs of both variants - medians are reported.")
+
+    def handle(self, *args, **options):
+        count = options["requests"]
+        runs = options["runs"]
+
+        results = {"without events": [], "with events": []}
+        with rolled_back():
+            seller = User.objects.create_user("bench_seller")
+            leader = User.objects.create_user("bench_leader")
+            bidder = User.objects.create_user("bench_bidder")
+
+            client = logged_in_client(bidder)
+
+            # Alternate variants, so that growing tables do not favour either of them
+            for _ in range(runs):
+                with mock.patch("auctions.bidding.enqueue_outbid"):
+                    results["without events"].append(self.run(client, seller, leader, count))
+                results["with events"].append(self.run(client, seller, leader, count))
+
+            events = NotificationEvent.objects.filter(user=leader).count()
+
+        for name, timings in results.items():
+            self.stdout.write(f"{name:>15}: median {statistics.median(timings) * 1000:.2f} ms per request "
+                              f"(runs: {', '.join(f'{timing * 1000:.2f}' for timing in timings)})")
+        self.stdout.write(self.style.SUCCESS(f"{events} outbid event(s) enqueued in {runs} run(s)."))
+
+    def run(self, client, seller, leader, count):
+        """Returns mean time of a bid request that outbids the leader on a fresh auction."""
+        Auction.objects.bulk_create([Auction(seller=seller, title=f"Benchmark {index}") for index in range(count)])
+        auction_ids = list(Auction.objects.filter(seller=seller).order_by("-id").values_list("id", flat=True)[:count])
+        for auction_id in auction_ids:
+            place_bid(auction_id, leader.id, 10)
+
+        start = time.perf_counter()
+        for auction_id in auction_ids:
+            client.post(reverse("auctions:bid"), {"bid_price": "20.00", "auction_id": auction_id})
+        return (time.perf_counter() - start) / count
@@ -0,0 +1,80 @@
+"""Contains command that precomputes auction similarities and per-user recommendations."""
+import random
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from auctions.recommendations import (cache_is_shared, compute_recommendations, compute_similarities,
+                                      load_interactions, open_auctions, store_similarities, warm_cache)
+
+
+class Command(BaseCommand):
+    help = ("Computes item-item similarity of auctions from bids and watchlists, "
+            "then recommendations of every user, which are stored in cache.")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--neighbours", type=int, default=None,
+                            help="Number of similar auctions stored per auction.")
+        parser.add_argument("--benchmark", type=int, metavar="INTERACTIONS", default=None,
+                            help="Only time the batch job on given number of synthetic interactions.")
+        parser.add_argument("--seed", type=int, default=0,
+                            help="Random seed of synthetic interactions.")
+
+    def handle(self, *args, **options):
+        if options["benchmark"] is not None:
+            interactions = self.synthetic_interactions(options["benchmark"], options["seed"])
+        else:
+            start = time.perf_counter()
+            interactions = load_interactions()
+            self.stdout.write(f"Loaded {len(interactions)} user(s) in {time.perf_counter() - start:.2f} s")
+
+        start = time.perf_counter()
+        similarities = compute_similarities(interactions, options["neighbours"])
+        self.stdout.write(f"Computed similarities of {len(similarities)} auction(s) "
+                          f"in {time.perf_counter() - start:.2f} s")
+
+        # Synthetic auctions are all open and have no seller
+        if options["benchmark"] is not None:
+            auctions = dict.fromkeys(similarities)
+        else:
+            auctions = open_auctions()
+
+        start = time.perf_counter()
+        recommendations = compute_recommendations(interactions, similarities, auctions)
+        self.stdout.write(f"Computed recommendations of {len(recommendations)} user(s) "
+                          f"in {time.perf_counter() - start:.2f} s")
+
+        if options["benchmark"] is not None:
+            return
+
+        start = time.perf_counter()
+        store_similarities(similarities)
+        self.stdout.write(self.style.SUCCESS(f"Stored similarities in {time.perf_counter() - start:.2f} s"))
+
+        # Recommendations stored in process-local cache would be gone on exit
+        if not cache_is_shared():
+            self.stderr.write(self.style.WARNING(
+                "Cache backend is local to this process - recommendations are not stored "
+                "and web workers compute them on first read. Configure shared cache in CACHES."
+            ))
+            return
+
+        start = time.perf_counter()
+        warm_cache(recommendations)
+        self.stdout.write(self.style.SUCCESS(f"Stored recommendations in {time.perf_counter() - start:.2f} s"))
+
+    def synthetic_interactions(self, total, seed):
+        """Returns given number of user-auction interactions with skewed
+        auction popularity: few hot auctions get most of the traffic.
+        """
+        rng = random.Random(seed)
+        users = max(1, total // 10)
+        auctions = max(1, total // 20)
+
+        interactions = defaultdict(set)
+        for _ in range(total):
+            # Cubed uniform value is close to 0 most of the time
+            auction_id = int(auctions * rng.random() ** 3)
+            interactions[rng.randrange(users)].add(auction_id)
+        return interactions
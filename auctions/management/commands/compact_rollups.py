@@ -0,0 +1,18 @@
+"""Contains command that downsamples old bid activity buckets."""
+from django.core.management.base import BaseCommand
+
+from auctions.timeseries import compact
+
+
+class Command(BaseCommand):
+    help = "Drops old minute buckets and merges old hour buckets of bid rollups into day buckets."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000,
+                            help="Number of buckets processed in one transaction.")
+
+    def handle(self, *args, **options):
+        deleted_minutes, deleted_hours = compact(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Compacted {deleted_minutes} minute bucket(s) and {deleted_hours} hour bucket(s)."
+        ))
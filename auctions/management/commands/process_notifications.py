@@ -0,0 +1,49 @@
+"""Contains command that runs notification delivery workers."""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from auctions.notifications import process_batch
+
+
+class Command(BaseCommand):
+    help = "Delivers queued notification events to inboxes and by email."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4,
+                            help="Number of worker threads.")
+        parser.add_argument("--batch-size", type=int, default=None,
+                            help="Number of events claimed by a worker at once.")
+        parser.add_argument("--poll-interval", type=float, default=1.0,
+                            help="Seconds an idle worker waits before checking the queue again.")
+        parser.add_argument("--once", action="store_true",
+                            help="Exit when the queue is empty instead of waiting for new events.")
+
+    def handle(self, *args, **options):
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            workers = [pool.submit(self.work, options) for _ in range(options["workers"])]
+            delivered = sum(worker.result() for worker in workers)
+
+        self.stdout.write(self.style.SUCCESS(f"Delivered {delivered} event(s)."))
+
+    def work(self, options):
+        """Single worker loop - returns number of delivered events."""
+        delivered = 0
+        try:
+            while True:
+                try:
+                    processed = process_batch(options["batch_size"])
+                except Exception as error:
+                    self.stderr.write(f"Delivery failed, batch will be retried: {error}")
+                    processed = 0
+
+                delivered += processed
+                if not processed:
+                    if options["once"]:
+                        return delivered
+                    time.sleep(options["poll_interval"])
+        finally:
+            # Every thread has its own database connection
+            connection.close()
@@ -0,0 +1,264 @@
+"""Contains command that fills database with large, realistic marketplace data."""
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from auctions.archive import update_statistics
+from auctions.models import User, Auction, Bid, Comment, Watchlist
+
+WORDS = ("vintage", "new", "used", "rare", "mint", "classic", "boxed", "signed",
+         "limited", "original", "custom", "handmade", "restored", "genuine", "spare")
+ITEMS = {
+    Auction.MOTORS: ("car", "motorbike", "helmet", "tyre", "scooter"),
+    Auction.FASHINON: ("jacket", "dress", "sneakers", "watch", "handbag"),
+    Auction.ELECTRONICS: ("laptop", "phone", "camera", "headphones", "console"),
+    Auction.COLLECTIBLES_ARTS: ("painting", "coin", "stamp", "poster", "figurine"),
+    Auction.HOME_GARDES: ("lamp", "chair", "table", "mower", "rug"),
+    Auction.SPORTING_GOODS: ("bike", "racket", "skis", "tent", "ball"),
+    Auction.TOYS: ("lego set", "doll", "puzzle", "train set", "board game"),
+    Auction.BUSSINES_INDUSTRIAL: ("drill", "generator", "printer", "forklift", "desk"),
+    Auction.MUSIC: ("guitar", "vinyl", "piano", "drum kit", "amplifier"),
+}
+COMMENTS = ("Is it still available?", "Can you ship abroad?", "What is the condition?",
+            "Any scratches?", "Great item!", "Is the price negotiable?", "How old is it?")
+
+# Share of auctions that are already closed
+CLOSED_RATIO = 0.2
+
+# Seeded data spans that many days back from now
+HISTORY_DAYS = 90
+
+
+@contextmanager
+def auto_now_add_disabled(*models):
+    """Lets bulk_create keep generated dates instead of overriding them with now."""
+    fields = [field for model in models for field in model._meta.concrete_fields
+              if getattr(field, "auto_now_add", False)]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+@contextmanager
+def fast_inserts():
+    """Defers constraint checks and trades durability for speed while seeding.
+    Database's own journal mode and synchronous setting are restored afterwards.
+    """
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute("PRAGMA synchronous")
+            synchronous = cursor.fetchone()[0]
+            cursor.execute("PRAGMA journal_mode")
+            journal_mode = cursor.fetchone()[0]
+            cursor.execute("PRAGMA synchronous = OFF")
+            cursor.execute("PRAGMA journal_mode = MEMORY")
+    try:
+        with connection.constraint_checks_disabled():
+            yield
+    finally:
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute(f"PRAGMA synchronous = {int(synchronous)}")
+                cursor.execute(f"PRAGMA journal_mode = {journal_mode}")
+
+
+class Command(BaseCommand):
+    help = "Generates users, auctions, bids, comments and watchlists with a reproducible seed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000)
+        parser.add_argument("--auctions", type=int, default=100000)
+        parser.add_argument("--bids", type=int, default=1000000)
+        parser.add_argument("--comments", type=int, default=200000)
+        parser.add_argument("--watchlists", type=int, default=200000)
+        parser.add_argument("--seed", type=int, default=0,
+                            help="Random seed - the same seed generates the same data.")
+        parser.add_argument("--chunk-size", type=int, default=10000,
+                            help="Number of rows inserted in one transaction.")
+        parser.add_argument("--skew", type=float, default=3.0,
+                            help="How much bids, comments and watchlists concentrate "
+                                 "on hot auctions (1 means uniform).")
+
+    def handle(self, *args, **options):
+        self.seed = options["seed"]
+        self.chunk_size = options["chunk_size"]
+        self.skew = options["skew"]
+        self.now = timezone.now()
+
+        with fast_inserts(), auto_now_add_disabled(Auction, Bid, Comment):
+            users = self.timed("users", self.create_users, options["users"])
+            auctions = self.timed("auctions", self.create_auctions, options["auctions"], users, options["bids"])
+            self.timed("bids", self.create_bids, options["bids"], users, auctions)
+            self.timed("comments", self.create_comments, options["comments"], users, auctions)
+            self.timed("watchlists", self.create_watchlists, options["watchlists"], users, auctions)
+
+        # Admin estimates row counts of big tables from planner statistics
+        self.timed("statistics", update_statistics)
+
+    # ------------------------------------------------------------------
+    # ----------------------------  Helpers  ---------------------------
+    # ------------------------------------------------------------------
+    def timed(self, name, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        self.stdout.write(f"Seeded {name} in {time.perf_counter() - start:.1f} s")
+        return result
+
+    def rng(self, name):
+        """Returns separate random generator for every kind of rows, so that
+        changing one count does not change the other generated rows.
+        """
+        return random.Random(f"{self.seed}-{name}")
+
+    def hot_index(self, rng, size):
+        """Returns index in [0, size) - low indexes are picked much more often."""
+        return int(size * rng.random() ** self.skew)
+
+    def insert(self, model, rows, **kwargs):
+        """Inserts rows from generator with bulk_create, one transaction per chunk."""
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                with transaction.atomic():
+                    model.objects.bulk_create(chunk, **kwargs)
+                chunk = []
+        with transaction.atomic():
+            model.objects.bulk_create(chunk, **kwargs)
+
+    def new_ids(self, model, last_id):
+        """Returns ids of rows inserted after last_id, in insert order."""
+        return list(model.objects.filter(pk__gt=last_id).order_by("pk").values_list("pk", flat=True))
+
+    def last_id(self, model):
+        return model.objects.aggregate(last_id=Max("pk"))["last_id"] or 0
+
+    # ------------------------------------------------------------------
+    # -----------------------------  Rows  -----------------------------
+    # ------------------------------------------------------------------
+    def create_users(self, count):
+        """Returns ids of new users - all share one password hash ("password")."""
+        last_id = self.last_id(User)
+        password = make_password("password")
+        prefix = f"seed{self.seed}_{last_id}_"
+
+        self.insert(User, (
+            User(username=f"{prefix}{index}", email=f"{prefix}{index}@example.com", password=password)
+            for index in range(count)
+        ))
+        return self.new_ids(User, last_id)
+
+    def create_auctions(self, count, users, bid_count):
+        """Returns list of (id, seller id, publication date) of new auctions.
+        Categories are cycled, so hot auctions (low indexes) cover all of them.
+        """
+        rng = self.rng("auctions")
+        categories = [code for code, _ in Auction.CATEGORY]
+
+        sellers, dates = [], []
+        for _ in range(count):
+            sellers.append(rng.choice(users))
+            dates.append(self.now - timedelta(seconds=rng.uniform(3600, HISTORY_DAYS * 86400)))
+
+        # Final prices and last bid dates have to be known before auctions are inserted
+        prices = [0] * count
+        last_dates = list(dates)
+        for index, _, price, date in self.bid_stream(bid_count, users, sellers, dates):
+            prices[index] = price
+            last_dates[index] = date
+
+        # Closed auctions are closed some time after their last bid
+        closing_rng = self.rng("closed")
+        closed_dates = [
+            last_dates[index] + (self.now - last_dates[index]) * closing_rng.random()
+            if closing_rng.random() < CLOSED_RATIO else None
+            for index in range(count)
+        ]
+
+        def rows():
+            for index in range(count):
+                # Cycle over categories so that every category is covered
+                category = categories[index % len(categories)]
+                yield Auction(
+                    seller_id=sellers[index],
+                    title=f"{rng.choice(WORDS).capitalize()} {rng.choice(ITEMS[category])}",
+                    description=" ".join(rng.choices(WORDS, k=12)),
+                    current_price=Decimal(prices[index]).scaleb(-2),
+                    category=category,
+                    publication_date=dates[index],
+                    closed=closed_dates[index] is not None,
+                    closed_date=closed_dates[index]
+                )
+
+        last_id = self.last_id(Auction)
+        self.insert(Auction, rows())
+        return list(zip(self.new_ids(Auction, last_id), sellers, dates))
+
+    def bid_stream(self, count, users, sellers, dates):
+        """Yields (auction index, user id, price in cents, date) of bids - the same ones
+        for the same seed. Prices and dates grow within every auction.
+        """
+        rng = self.rng("bids")
+        prices = {}
+        last_dates = {}
+
+        for _ in range(count):
+            index = self.hot_index(rng, len(sellers))
+            user_id = rng.choice(users)
+            if user_id == sellers[index]:
+                continue
+
+            # Prices are kept in cents - integers are much cheaper than Decimal
+            price = prices.get(index, rng.randint(100, 50000)) + rng.randint(1, 2000)
+            prices[index] = price
+
+            date = last_dates.get(index, dates[index]) + timedelta(seconds=rng.expovariate(1 / 600))
+            date = min(date, self.now)
+            last_dates[index] = date
+
+            yield index, user_id, price, date
+
+    def create_bids(self, count, users, auctions):
+        sellers = [seller for _, seller, _ in auctions]
+        dates = [date for _, _, date in auctions]
+
+        self.insert(Bid, (
+            Bid(auction_id=auctions[index][0], user_id=user_id, bid_price=Decimal(price).scaleb(-2),
+                bid_date=date)
+            for index, user_id, price, date in self.bid_stream(count, users, sellers, dates)
+        ))
+
+    def create_comments(self, count, users, auctions):
+        rng = self.rng("comments")
+
+        def rows():
+            for _ in range(count):
+                auction_id, _, publication_date = auctions[self.hot_index(rng, len(auctions))]
+                yield Comment(
+                    auction_id=auction_id,
+                    user_id=rng.choice(users),
+                    comment=rng.choice(COMMENTS),
+                    comment_date=publication_date + (self.now - publication_date) * rng.random()
+                )
+
+        self.insert(Comment, rows())
+
+    def create_watchlists(self, count, users, auctions):
+        rng = self.rng("watchlists")
+
+        # Duplicated pairs are skipped by the unique constraint
+        self.insert(Watchlist, (
+            Watchlist(auction_id=auctions[self.hot_index(rng, len(auctions))][0], user_id=rng.choice(users))
+            for _ in range(count)
+        ), ignore_conflicts=True)
@@ -0,0 +1,107 @@
+"""Contains command that reports worker's startup cost: import time and memory."""
+import os
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from auctions.warmup import warmup
+
+# Code run in a fresh interpreter to measure import time of a worker -
+# warmup is disabled there and measured separately
+WORKER_STARTUP = "import commerce.wsgi"
+
+
+def rss_kb(pid="self"):
+    """Returns resident set size of the process in kB (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except FileNotFoundError:
+        raise CommandError(f"Process {pid} does not exist or /proc is not available")
+    raise CommandError(f"Cannot read memory of process {pid}")
+
+def available_memory_kb():
+    """Returns memory available for new processes in kB (Linux only)."""
+    with open("/proc/meminfo") as meminfo:
+        for line in meminfo:
+            if line.startswith("MemAvailable:"):
+                return int(line.split()[1])
+    return None
+
+
+class Command(BaseCommand):
+    help = "Reports import time of a fresh worker, warmup time and per-worker memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--importtime", action="store_true",
+                            help="Show modules that take the most time to import (python -X importtime).")
+        parser.add_argument("--top", type=int, default=20,
+                            help="Number of modules shown by --importtime.")
+        parser.add_argument("--rss", action="store_true",
+                            help="Show memory of this process before and after warmup.")
+        parser.add_argument("--pids", type=int, nargs="+", default=[],
+                            help="Show memory of running worker processes, e.g. gunicorn workers.")
+
+    def handle(self, *args, **options):
+        if not (options["importtime"] or options["rss"] or options["pids"]):
+            options["importtime"] = options["rss"] = True
+
+        if options["importtime"]:
+            self.import_time(options["top"])
+        if options["rss"]:
+            self.warmup_memory()
+        if options["pids"]:
+            self.workers_memory(options["pids"])
+
+    def import_time(self, top):
+        """Runs worker startup without warmup in a fresh interpreter with -X importtime."""
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", WORKER_STARTUP],
+                                capture_output=True, text=True, env={**os.environ, "COMMERCE_WARMUP": "0"})
+        if result.returncode != 0:
+            raise CommandError(f"Worker startup failed:\n{result.stderr[-2000:]}")
+
+        # Lines look like: "import time:       123 |       4567 |   package.module"
+        modules = []
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            modules.append((int(cumulative_us), int(self_us), name.rstrip()))
+
+        total = sum(self_us for _, self_us, _ in modules)
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Importing {len(modules)} modules took {total / 1000:.0f} ms. Slowest:"
+        ))
+        self.stdout.write(f"{'cumulative ms':>14} {'self ms':>8}  module")
+        for cumulative_us, self_us, name in sorted(modules, reverse=True)[:top]:
+            self.stdout.write(f"{cumulative_us / 1000:>14.1f} {self_us / 1000:>8.1f}  {name}")
+
+    def warmup_memory(self):
+        """Runs warmup hook in this process and reports its cost."""
+        before = rss_kb()
+        start = time.perf_counter()
+        templates = warmup()
+        elapsed = time.perf_counter() - start
+        after = rss_kb()
+
+        self.stdout.write(self.style.MIGRATE_HEADING("Warmup:"))
+        self.stdout.write(f"  loaded {templates} templates in {elapsed * 1000:.0f} ms")
+        self.stdout.write(f"  RSS before warmup: {before / 1024:.1f} MB, after: {after / 1024:.1f} MB")
+
+    def workers_memory(self, pids):
+        """Reports memory of given processes and how many such workers fit in memory."""
+        self.stdout.write(self.style.MIGRATE_HEADING("Workers:"))
+        sizes = []
+        for pid in pids:
+            sizes.append(rss_kb(pid))
+            self.stdout.write(f"  pid {pid}: {sizes[-1] / 1024:.1f} MB")
+
+        average = sum(sizes) / len(sizes)
+        available = available_memory_kb()
+        self.stdout.write(f"  average: {average / 1024:.1f} MB per worker")
+        if available is not None:
+            self.stdout.write(f"  available memory fits about {int(available // average)} more worker(s)")
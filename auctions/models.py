@@ -16,6 +16,7 @@ class Auction(models.Model):
     * what is auction's category
     * auction's image URL
     * is auction closed?
+    * when auction was closed
     """
 
     # Categories - choices
@@ -40,6 +41,8 @@ class Auction(models.Model):
         (BUSSINES_INDUSTRIAL, "Business & Industrial"),
         (MUSIC, "Music"),
     ]
+    # Category code -> full name
+    CATEGORY_NAMES = dict(CATEGORY)
 
     # Model fields
     # auto: auction_id
@@ -49,12 +52,17 @@ class Auction(models.Model):
     current_price = models.DecimalField(max_digits=11, decimal_places=2, default=0.0)
     category = models.CharField(max_length=3, choices=CATEGORY, default=MOTORS)
     image_url = models.URLField(blank=True)
-    publication_date = models.DateTimeField(auto_now_add=True)
+    publication_date = models.DateTimeField(auto_now_add=True, db_index=True)
     closed = models.BooleanField(default=False)
+    closed_date = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         verbose_name = "auction"
         verbose_name_plural = "auctions"
+        # Covers finding closed auctions to archive
+        indexes = [
+            models.Index(fields=["closed", "closed_date"])
+        ]
 
     def __str__(self):
         return f"Auction id: {self.id}, title: {self.title}, seller: {self.seller}"
@@ -71,16 +79,48 @@ class Bid(models.Model):
     # auto: bid_id
     auction = models.ForeignKey(Auction, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
-    bid_date = models.DateTimeField(auto_now_add=True)
+    bid_date = models.DateTimeField(auto_now_add=True, db_index=True)
     bid_price = models.DecimalField(max_digits=11, decimal_places=2)
 
     class Meta:
         verbose_name = "bid"
         verbose_name_plural = "bids"
+        # Covers looking up the highest bid of an auction
+        indexes = [
+            models.Index(fields=["auction", "-bid_price"])
+        ]
 
     def __str__(self):
         return f"{self.user} bid {self.bid_price} $ on {self.auction}"
 
+class ProxyBid(models.Model):
+    """ProxyBid model contains user's hidden maximum for an auction:
+    * on what auction
+    * who bids
+    * up to what price the user is willing to bid
+    * when the maximum was set (earlier maximum wins a tie)
+    """
+
+    # Model fields
+    # auto: proxy_bid_id
+    auction = models.ForeignKey(Auction, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    max_price = models.DecimalField(max_digits=11, decimal_places=2)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "proxy bid"
+        verbose_name_plural = "proxy bids"
+        # One maximum per user on each auction
+        unique_together = ["auction", "user"]
+        # Covers looking up the strongest proxies of an auction
+        indexes = [
+            models.Index(fields=["auction", "-max_price", "created"])
+        ]
+
+    def __str__(self):
+        return f"{self.user} bids up to {self.max_price} $ on {self.auction}"
+
 class Comment(models.Model):
     """Comment model contains all info about single comment
     * content
@@ -94,10 +134,14 @@ class Comment(models.Model):
     auction = models.ForeignKey(Auction, on_delete=models.CASCADE)
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     comment = models.TextField(blank=False)
-    comment_date = models.DateTimeField(auto_now_add=True, null=True)
+    comment_date = models.DateTimeField(auto_now_add=True, null=True, db_index=True)
     class Meta:
         verbose_name = "comment"
         verbose_name_plural = "comments"
+        # Covers paginating auction's comments by (comment_date, id)
+        indexes = [
+            models.Index(fields=["auction", "comment_date", "id"])
+        ]
 
     def __str__(self):
         return f"Comment {self.id} on auction {self.auction} made by {self.user}"
@@ -121,3 +165,207 @@ class Watchlist(models.Model):
 
     def __str__(self):
         return f"{self.auction} on user {self.user} watchlist"
+
+class BidRollup(models.Model):
+    """BidRollup model contains bid activity aggregated over one time bucket
+    for a single auction or (if auction is empty) for a whole category:
+    * bucket resolution and start
+    * number of bids
+    * highest bid price
+    * number of unique bidders
+    """
+
+    # Resolutions - choices
+    MINUTE = "m"
+    HOUR = "h"
+    DAY = "d"
+
+    RESOLUTION = [
+        (MINUTE, "Minute"),
+        (HOUR, "Hour"),
+        (DAY, "Day"),
+    ]
+
+    # Model fields
+    # auto: rollup_id
+    # Rows outlive their auction - archived auctions keep their ids and price history
+    auction = models.ForeignKey(Auction, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True)
+    category = models.CharField(max_length=3, choices=Auction.CATEGORY)
+    resolution = models.CharField(max_length=1, choices=RESOLUTION)
+    bucket = models.DateTimeField()
+    bid_count = models.PositiveIntegerField(default=0)
+    max_price = models.DecimalField(max_digits=11, decimal_places=2, default=0.0)
+    unique_bidders = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "bid rollup"
+        verbose_name_plural = "bid rollups"
+        # One row per bucket for each auction and for each category
+        constraints = [
+            models.UniqueConstraint(fields=["resolution", "bucket", "auction"],
+                                    condition=models.Q(auction__isnull=False),
+                                    name="unique_auction_bucket"),
+            models.UniqueConstraint(fields=["resolution", "bucket", "category"],
+                                    condition=models.Q(auction__isnull=True),
+                                    name="unique_category_bucket"),
+        ]
+        indexes = [
+            models.Index(fields=["resolution", "bucket"])
+        ]
+
+    def __str__(self):
+        scope = f"auction {self.auction_id}" if self.auction_id else f"category {self.category}"
+        return f"{self.bid_count} bid(s) on {scope} in {self.get_resolution_display().lower()} {self.bucket}"
+
+class AuctionSimilarity(models.Model):
+    """AuctionSimilarity model contains precomputed item-item similarity:
+    * auction
+    * similar auction
+    * how similar they are (cosine of bid and watchlist co-occurrence)
+    """
+
+    # Model fields
+    # auto: similarity_id
+    auction = models.ForeignKey(Auction, on_delete=models.CASCADE, related_name="similarities")
+    similar = models.ForeignKey(Auction, on_delete=models.CASCADE, related_name="+")
+    score = models.FloatField()
+
+    class Meta:
+        verbose_name = "auction similarity"
+        verbose_name_plural = "auction similarities"
+        unique_together = ["auction", "similar"]
+
+    def __str__(self):
+        return f"Auction {self.auction_id} is similar to auction {self.similar_id} ({self.score:.3f})"
+
+class NotificationEvent(models.Model):
+    """NotificationEvent model is a durable queue of events waiting for delivery:
+    * what happened
+    * to whom (empty if recipients are found on delivery, e.g. watchers)
+    * on what auction
+    * event's text
+    * key used to drop duplicated events
+    * delivery attempts, when it can be tried again and which worker claimed it
+    """
+
+    # Kinds - choices
+    OUTBID = "OUT"
+    AUCTION_CLOSED = "CLO"
+
+    KIND = [
+        (OUTBID, "Outbid"),
+        (AUCTION_CLOSED, "Auction closed"),
+    ]
+
+    # Model fields
+    # auto: event_id
+    kind = models.CharField(max_length=3, choices=KIND)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    auction = models.ForeignKey(Auction, on_delete=models.SET_NULL, null=True, blank=True)
+    message = models.TextField()
+    dedup_key = models.CharField(max_length=128, unique=True)
+    created = models.DateTimeField(auto_now_add=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(db_index=True)
+    claimed_by = models.CharField(max_length=32, blank=True, db_index=True)
+    failed = models.BooleanField(default=False)
+
+    class Meta:
+        verbose_name = "notification event"
+        verbose_name_plural = "notification events"
+
+    def __str__(self):
+        return f"{self.get_kind_display()} event {self.id}: {self.message}"
+
+class Notification(models.Model):
+    """Notification model contains single message in user's inbox:
+    * whose inbox
+    * on what auction
+    * message's text
+    * when it was delivered
+    * was it read
+    """
+
+    # Model fields
+    # auto: notification_id
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="notifications")
+    # Id is kept when auction is moved to archive - listing page still shows it from there
+    auction = models.ForeignKey(Auction, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True)
+    message = models.TextField()
+    event_key = models.CharField(max_length=128)
+    created = models.DateTimeField(auto_now_add=True)
+    read = models.BooleanField(default=False)
+
+    class Meta:
+        verbose_name = "notification"
+        verbose_name_plural = "notifications"
+        # Retried events do not duplicate messages
+        unique_together = ["user", "event_key"]
+        indexes = [
+            models.Index(fields=["user", "-created"])
+        ]
+
+    def __str__(self):
+        return f"Notification for {self.user}: {self.message}"
+
+class ArchivedAuction(models.Model):
+    """ArchivedAuction model contains closed auction moved out of Auction table.
+    Keeps the same id and all Auction's fields, and additionally:
+    * who won the auction
+    """
+
+    # Model fields
+    id = models.PositiveIntegerField(primary_key=True)
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    title = models.CharField(max_length=64, blank=False)
+    description = models.TextField(blank=True)
+    current_price = models.DecimalField(max_digits=11, decimal_places=2, default=0.0)
+    category = models.CharField(max_length=3, choices=Auction.CATEGORY, default=Auction.MOTORS)
+    image_url = models.URLField(blank=True)
+    publication_date = models.DateTimeField()
+    closed_date = models.DateTimeField(null=True, blank=True)
+    winner = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+
+    # Archived auctions are always closed
+    closed = True
+
+    class Meta:
+        verbose_name = "archived auction"
+        verbose_name_plural = "archived auctions"
+
+    def __str__(self):
+        return f"Archived auction id: {self.id}, title: {self.title}, seller: {self.seller}"
+
+class ArchivedBid(models.Model):
+    """ArchivedBid model contains bid of an archived auction - the same fields as Bid."""
+
+    # Model fields
+    id = models.PositiveIntegerField(primary_key=True)
+    auction = models.ForeignKey(ArchivedAuction, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    bid_date = models.DateTimeField()
+    bid_price = models.DecimalField(max_digits=11, decimal_places=2)
+
+    class Meta:
+        verbose_name = "archived bid"
+        verbose_name_plural = "archived bids"
+
+    def __str__(self):
+        return f"{self.user} bid {self.bid_price} $ on {self.auction}"
+
+class ArchivedComment(models.Model):
+    """ArchivedComment model contains comment of an archived auction - the same fields as Comment."""
+
+    # Model fields
+    id = models.PositiveIntegerField(primary_key=True)
+    auction = models.ForeignKey(ArchivedAuction, on_delete=models.CASCADE)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    comment = models.TextField(blank=False)
+    comment_date = models.DateTimeField(null=True)
+
+    class Meta:
+        verbose_name = "archived comment"
+        verbose_name_plural = "archived comments"
+
+    def __str__(self):
+        return f"Comment {self.id} on archived auction {self.auction} made by {self.user}"
@@ -0,0 +1,141 @@
+"""Contains notification subsystem: views enqueue events in a DB-backed queue,
+workers deliver them to users' inboxes and by email in batches."""
+
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection, send_mass_mail
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Notification, NotificationEvent, User, Watchlist
+
+# ----------------------------------------------------------------------
+# -----------------------------  Enqueue  ------------------------------
+# ----------------------------------------------------------------------
+def enqueue_outbid(auction, user_ids, price):
+    """Enqueues outbid events for given users with one insert."""
+    now = timezone.now()
+    NotificationEvent.objects.bulk_create([
+        NotificationEvent(
+            kind=NotificationEvent.OUTBID,
+            user_id=user_id,
+            auction=auction,
+            message=f"You have been outbid on {auction.title} - current price is {price} $",
+            dedup_key=f"outbid:{auction.id}:{user_id}:{price}",
+            available_at=now
+        )
+        for user_id in user_ids
+    ], ignore_conflicts=True)
+
+def enqueue_auctions_closed(auctions):
+    """Enqueues one closed auction event per auction with one insert -
+    watchers are found on delivery."""
+    now = timezone.now()
+    NotificationEvent.objects.bulk_create([
+        NotificationEvent(
+            kind=NotificationEvent.AUCTION_CLOSED,
+            auction=auction,
+            message=f"Auction {auction.title} from your watchlist has been closed",
+            dedup_key=f"closed:{auction.id}",
+            available_at=now
+        )
+        for auction in auctions
+    ], ignore_conflicts=True)
+
+# ----------------------------------------------------------------------
+# -----------------------------  Delivery  -----------------------------
+# ----------------------------------------------------------------------
+def claim(batch_size):
+    """Claims batch of available events for this worker and returns them.
+
+    Claimed events become available again after NOTIFICATION_LEASE_SECONDS,
+    so events of a crashed worker are retried - but only until they reach
+    NOTIFICATION_MAX_ATTEMPTS, so an event that crashes or hangs every worker
+    is not claimed forever.
+    """
+    token = uuid.uuid4().hex
+    now = timezone.now()
+
+    # Single UPDATE - rows taken by another worker in the meantime are skipped
+    available = NotificationEvent.objects.filter(
+        available_at__lte=now,
+        failed=False,
+        attempts__lt=settings.NOTIFICATION_MAX_ATTEMPTS
+    ).order_by("available_at").values("id")[:batch_size]
+    NotificationEvent.objects.filter(id__in=available, available_at__lte=now).update(
+        claimed_by=token,
+        attempts=F("attempts") + 1,
+        available_at=now + timedelta(seconds=settings.NOTIFICATION_LEASE_SECONDS)
+    )
+
+    return list(NotificationEvent.objects.filter(claimed_by=token))
+
+def _recipients(events):
+    """Returns dict: event id -> list of recipient ids."""
+    closed_auctions = [event.auction_id for event in events
+                       if event.kind == NotificationEvent.AUCTION_CLOSED and event.auction_id]
+
+    # Fan out closed auction events to all watchers with one query
+    watchers = {}
+    for auction_id, user_id in Watchlist.objects.filter(auction__in=closed_auctions).values_list("auction", "user"):
+        watchers.setdefault(auction_id, []).append(user_id)
+
+    recipients = {}
+    for event in events:
+        if event.kind == NotificationEvent.AUCTION_CLOSED:
+            recipients[event.id] = watchers.get(event.auction_id, [])
+        else:
+            recipients[event.id] = [event.user_id]
+    return recipients
+
+def deliver(events):
+    """Saves inbox messages and sends emails for given events."""
+    recipients = _recipients(events)
+    emails = dict(User.objects.filter(
+        id__in={user_id for user_ids in recipients.values() for user_id in user_ids}
+    ).exclude(email="").values_list("id", "email"))
+
+    notifications, messages = [], []
+    for event in events:
+        for user_id in recipients[event.id]:
+            notifications.append(Notification(
+                user_id=user_id,
+                auction_id=event.auction_id,
+                message=event.message,
+                event_key=event.dedup_key
+            ))
+            if user_id in emails:
+                messages.append(("Auctions notification", event.message,
+                                 settings.NOTIFICATION_EMAIL_FROM, [emails[user_id]]))
+
+    # Messages already saved by previous attempt are skipped
+    Notification.objects.bulk_create(notifications, ignore_conflicts=True)
+    send_mass_mail(messages, connection=get_connection(settings.NOTIFICATION_EMAIL_BACKEND))
+
+def process_batch(batch_size=None):
+    """Delivers one batch of events. Returns number of processed events."""
+    if batch_size is None:
+        batch_size = settings.NOTIFICATION_BATCH_SIZE
+
+    events = claim(batch_size)
+    if not events:
+        return 0
+
+    ids = [event.id for event in events]
+    try:
+        deliver(events)
+    except Exception:
+        # Retry later with exponential backoff, give up after too many attempts
+        for event in events:
+            delay = settings.NOTIFICATION_RETRY_SECONDS * 2 ** (event.attempts - 1)
+            NotificationEvent.objects.filter(id=event.id).update(
+                claimed_by="",
+                available_at=timezone.now() + timedelta(seconds=delay),
+                failed=event.attempts >= settings.NOTIFICATION_MAX_ATTEMPTS
+            )
+        raise
+
+    NotificationEvent.objects.filter(id__in=ids).delete()
+    return len(events)
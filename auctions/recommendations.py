@@ -0,0 +1,168 @@
+"""Contains "recommended for you" engine: item-item similarity and per-user
+recommendations built in batch from bid and watchlist co-occurrence,
+per-user recommendations served from cache."""
+
+import heapq
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+from .models import Auction, AuctionSimilarity, Bid, Watchlist
+
+# ----------------------------------------------------------------------
+# ------------------------------  Batch  -------------------------------
+# ----------------------------------------------------------------------
+def load_interactions():
+    """Returns dict: user id -> set of auction ids the user bid on or watches."""
+    interactions = defaultdict(set)
+
+    bids = Bid.objects.values_list("user", "auction").distinct().iterator(chunk_size=10000)
+    watched = Watchlist.objects.values_list("user", "auction").iterator(chunk_size=10000)
+    for rows in (bids, watched):
+        for user_id, auction_id in rows:
+            interactions[user_id].add(auction_id)
+
+    return interactions
+
+def compute_similarities(interactions, neighbours=None, max_items_per_user=None):
+    """Returns dict: auction id -> list of (similar auction id, score) pairs,
+    best neighbours first.
+
+    Score is cosine similarity of auctions' user vectors: co-occurrence count
+    divided by square root of both auctions' popularity. Users with very long
+    histories are trimmed to their latest auctions, as their pairs add
+    little signal and grow quadratically.
+    """
+    if neighbours is None:
+        neighbours = settings.RECOMMENDATION_NEIGHBOURS
+    if max_items_per_user is None:
+        max_items_per_user = settings.RECOMMENDATION_MAX_ITEMS_PER_USER
+
+    popularity = defaultdict(int)
+    co_occurrence = defaultdict(lambda: defaultdict(int))
+
+    for items in interactions.values():
+        items = sorted(items)[-max_items_per_user:]
+        for index, first in enumerate(items):
+            popularity[first] += 1
+            first_row = co_occurrence[first]
+            for second in items[index + 1:]:
+                first_row[second] += 1
+                co_occurrence[second][first] += 1
+
+    similarities = {}
+    for auction_id, row in co_occurrence.items():
+        norm = popularity[auction_id]
+        scores = ((other, count / math.sqrt(norm * popularity[other])) for other, count in row.items())
+        similarities[auction_id] = heapq.nlargest(neighbours, scores, key=lambda pair: pair[1])
+
+    return similarities
+
+def store_similarities(similarities, batch_size=5000):
+    """Replaces all stored similarities with given ones."""
+    with transaction.atomic():
+        AuctionSimilarity.objects.all().delete()
+
+        batch = []
+        for auction_id, pairs in similarities.items():
+            for similar_id, score in pairs:
+                batch.append(AuctionSimilarity(auction_id=auction_id, similar_id=similar_id, score=score))
+                if len(batch) >= batch_size:
+                    AuctionSimilarity.objects.bulk_create(batch)
+                    batch = []
+        AuctionSimilarity.objects.bulk_create(batch)
+
+def open_auctions():
+    """Returns dict: open auction id -> seller id."""
+    return dict(Auction.objects.filter(closed=False).values_list("id", "seller").iterator(chunk_size=10000))
+
+def compute_recommendations(interactions, similarities, auctions, limit=None, max_items_per_user=None):
+    """Returns dict: user id -> ids of recommended auctions, best first.
+
+    Only auctions from given dict (auction id -> seller id) that the user
+    did not interact with and does not sell are recommended.
+    """
+    if limit is None:
+        limit = settings.RECOMMENDATION_LIMIT
+    if max_items_per_user is None:
+        max_items_per_user = settings.RECOMMENDATION_MAX_ITEMS_PER_USER
+
+    recommendations = {}
+    for user_id, items in interactions.items():
+        scores = defaultdict(float)
+        for auction_id in sorted(items)[-max_items_per_user:]:
+            for similar_id, score in similarities.get(auction_id, ()):
+                # Closed auctions are missing from dict and treated like user's own
+                if similar_id not in items and auctions.get(similar_id, user_id) != user_id:
+                    scores[similar_id] += score
+        recommendations[user_id] = heapq.nlargest(limit, scores, key=scores.get)
+
+    return recommendations
+
+def cache_is_shared():
+    """Returns False if cache lives only inside this process, so other
+    processes (web workers) would never see values stored here."""
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+def warm_cache(recommendations, batch_size=1000):
+    """Stores precomputed recommendations in cache, so reads do not compute them."""
+    batch = {}
+    for user_id, auction_ids in recommendations.items():
+        batch[_cache_key(user_id)] = auction_ids
+        if len(batch) >= batch_size:
+            cache.set_many(batch, settings.RECOMMENDATION_CACHE_TIMEOUT)
+            batch = {}
+    cache.set_many(batch, settings.RECOMMENDATION_CACHE_TIMEOUT)
+
+# ----------------------------------------------------------------------
+# ------------------------------  Serve  -------------------------------
+# ----------------------------------------------------------------------
+def _cache_key(user_id):
+    return f"recommendations:{user_id}"
+
+def _compute_for_user(user_id, limit):
+    """Returns ids of open auctions best matching user's latest bids and watchlist.
+    Used on cache miss - e.g. right after user's activity changed.
+    """
+    max_items = settings.RECOMMENDATION_MAX_ITEMS_PER_USER
+    seen = set(Bid.objects.filter(user=user_id).order_by("-id").values_list("auction", flat=True)[:max_items])
+    seen.update(Watchlist.objects.filter(user=user_id).order_by("-id").values_list("auction", flat=True)[:max_items])
+    if not seen:
+        return []
+
+    scores = defaultdict(float)
+    neighbours = AuctionSimilarity.objects.filter(
+        auction__in=seen,
+        similar__closed=False
+    ).exclude(similar__seller=user_id).values_list("similar", "score")
+    for similar_id, score in neighbours:
+        if similar_id not in seen:
+            scores[similar_id] += score
+
+    return heapq.nlargest(limit, scores, key=scores.get)
+
+def recommended_auctions(user_id, limit=None):
+    """Returns user's top recommended open auctions, best first."""
+    if limit is None:
+        limit = settings.RECOMMENDATION_LIMIT
+
+    auction_ids = cache.get(_cache_key(user_id))
+    if auction_ids is None:
+        auction_ids = _compute_for_user(user_id, limit)
+        cache.set(_cache_key(user_id), auction_ids, settings.RECOMMENDATION_CACHE_TIMEOUT)
+
+    auctions = Auction.objects.in_bulk(auction_ids)
+    return [auctions[auction_id] for auction_id in auction_ids
+            if auction_id in auctions and not auctions[auction_id].closed]
+
+def refresh_user(user_id):
+    """Drops cached recommendations of the user, so that new bids
+    and watchlist changes are taken into account on next read.
+    Similarities themselves change only in the batch job.
+    """
+    cache.delete(_cache_key(user_id))
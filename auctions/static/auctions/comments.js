@@ -0,0 +1,50 @@
+document.addEventListener("DOMContentLoaded", function (event) {
+
+    const loadMore = document.getElementById('load-more-comments');
+    const commentSection = document.querySelector('.comment-section');
+
+    // Builds single comment the same way as listing page template does
+    const renderComment = (comment) => {
+        const wrapper = document.createElement('div');
+        wrapper.className = 'single-comment mb-3';
+
+        const text = document.createElement('div');
+        text.className = 'comment-text';
+        text.textContent = comment.comment;
+
+        const author = document.createElement('div');
+        author.className = 'comment-author';
+        author.textContent = '~ ' + comment.username;
+
+        const date = document.createElement('small');
+        date.textContent = comment.comment_date;
+
+        wrapper.append(text, author, date);
+        return wrapper;
+    }
+
+    // Validate that all elements exist
+    if (loadMore && commentSection) {
+        loadMore.addEventListener('click', () => {
+            loadMore.disabled = true;
+            const url = loadMore.dataset.url + '?cursor=' + encodeURIComponent(loadMore.dataset.cursor);
+
+            fetch(url)
+                .then(response => response.json())
+                .then(data => {
+                    data.comments.forEach(comment => commentSection.append(renderComment(comment)));
+
+                    // Hide button after the last page
+                    if (data.cursor) {
+                        loadMore.dataset.cursor = data.cursor;
+                        loadMore.disabled = false;
+                    } else {
+                        loadMore.remove();
+                    }
+                })
+                .catch(() => {
+                    loadMore.disabled = false;
+                });
+        })
+    }
+});
@@ -1,4 +1,645 @@
 """Contains app's tests."""
-from django.test import TestCase
+import json
+import math
+import random
+import time
+from io import StringIO
+from decimal import Decimal
+from unittest import mock
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .admin import EstimatedCountPaginator
+from .archive import archivable, archive, update_statistics
+from .bidding import BidError, place_bid
+from .comments import (CommentBuffer, allow_comment, comment_buffer, decode_cursor, encode_cursor,
+                       get_comments_page, save_comment)
+from .notifications import claim
+from .recommendations import (_cache_key, compute_recommendations, compute_similarities,
+                              recommended_auctions)
+from .timeseries import compact, record_bid, trending_auctions
+from .models import (User, Auction, Bid, Comment, Watchlist, BidRollup, Notification, NotificationEvent, ProxyBid,
+                     ArchivedAuction, ArchivedBid, ArchivedComment)
 
 # Create your tests here.
+
+# ----------------------------------------------------------------------
+# -----------------------------  Admin  --------------------------------
+# ----------------------------------------------------------------------
+class AdminChangelistTests(TestCase):
+    """Changelists of big tables take the same number of queries
+    regardless of how many rows they show."""
+    # Session, user, estimated count (2 queries) and page;
+    # plus date hierarchy (2 queries) where it is set
+    QUERIES = {"auction": 7, "bid": 7, "comment": 7, "watchlist": 5, "bidrollup": 5}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser("admin", "admin@example.com", "password")
+
+    def create_rows(self, count):
+        User.objects.bulk_create([User(username=f"user_{count}_{index}") for index in range(count)])
+        users = list(User.objects.filter(username__startswith=f"user_{count}_"))
+        Auction.objects.bulk_create([Auction(seller=user, title=f"Auction {index}")
+                                     for index, user in enumerate(users)])
+        auctions = list(Auction.objects.filter(seller__in=users))
+        Bid.objects.bulk_create([Bid(auction=auction, user=user, bid_price=Decimal(10))
+                                 for auction, user in zip(auctions, reversed(users))])
+        Comment.objects.bulk_create([Comment(auction=auction, user=user, comment="Comment")
+                                     for auction, user in zip(auctions, reversed(users))])
+        Watchlist.objects.bulk_create([Watchlist(auction=auction, user=user)
+                                       for auction, user in zip(auctions, reversed(users))])
+        BidRollup.objects.bulk_create([BidRollup(auction=auction, resolution=BidRollup.HOUR,
+                                                 bucket=auction.publication_date, bid_count=1,
+                                                 max_price=Decimal(10), unique_bidders=1)
+                                       for auction in auctions])
+
+    def test_changelist_queries(self):
+        """Number of queries does not grow with number of rows."""
+        self.client.force_login(self.admin)
+        for count in (5, 60):
+            self.create_rows(count)
+            for model, queries in self.QUERIES.items():
+                with self.subTest(model=model, rows=count), self.assertNumQueries(queries):
+                    response = self.client.get(reverse(f"admin:auctions_{model}_changelist"))
+                self.assertEqual(response.status_code, 200)
+
+    def test_estimate_follows_deletes(self):
+        """Estimated count drops after rows are deleted and statistics refreshed."""
+        self.create_rows(60)
+        paginator = EstimatedCountPaginator(Auction.objects.order_by("id"), 50)
+        self.assertEqual(paginator.count, Auction.objects.order_by("-id").first().id)
+
+        last_ids = Auction.objects.order_by("-id").values_list("id", flat=True)[:40]
+        Auction.objects.filter(id__in=list(last_ids)).delete()
+        update_statistics()
+        paginator = EstimatedCountPaginator(Auction.objects.order_by("id"), 50)
+        self.assertEqual(paginator.count, 20)
+
+    def test_close_auctions_enqueues_events(self):
+        self.client.force_login(self.admin)
+        self.create_rows(3)
+        auctions = list(Auction.objects.order_by("id").values_list("id", flat=True))
+        Auction.objects.filter(id=auctions[0]).update(closed=True)
+
+        response = self.client.post(reverse("admin:auctions_auction_changelist"),
+                                    {"action": "close_auctions", "_selected_action": auctions})
+
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Auction.objects.filter(closed=False).exists())
+        self.assertCountEqual(NotificationEvent.objects.values_list("auction", flat=True), auctions[1:])
+
+    def test_filtered_count_is_exact(self):
+        self.create_rows(10)
+        paginator = EstimatedCountPaginator(Auction.objects.filter(title="Auction 3").order_by("id"), 50)
+        self.assertEqual(paginator.count, 1)
+
+
+# ----------------------------------------------------------------------
+# ----------------------------  Comments  ------------------------------
+# ----------------------------------------------------------------------
+class CommentTests(TestCase):
+    """Keyset pagination, rate limiting and buffered writes of comments."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user("seller")
+        cls.user = User.objects.create_user("user")
+        cls.auction = Auction.objects.create(seller=cls.seller, title="Auction")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_follow_each_other(self):
+        # Pairs of comments share a date - ties are broken by id
+        date = timezone.now()
+        Comment.objects.bulk_create([
+            Comment(auction=self.auction, user=self.user, comment=str(index),
+                    comment_date=date + timedelta(seconds=index // 2))
+            for index in range(25)
+        ])
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            comments, next_cursor = get_comments_page(self.auction.id, cursor, page_size=10)
+            seen.extend(comment.comment for comment in comments)
+            pages += 1
+            if next_cursor is None:
+                break
+            cursor = decode_cursor(next_cursor)
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, [str(index) for index in range(25)])
+
+    def test_cursor_round_trip_and_invalid_cursors(self):
+        comment = Comment.objects.create(auction=self.auction, user=self.user, comment="Comment")
+        self.assertEqual(decode_cursor(encode_cursor(comment)), (comment.comment_date, comment.id))
+        for cursor in ("", "abc", "2020-01-01T00:00:00_x", "not-a-date_1", None):
+            with self.subTest(cursor=cursor):
+                self.assertIsNone(decode_cursor(cursor))
+
+    @override_settings(COMMENT_RATE_BURST=3, COMMENT_RATE_PER_MINUTE=1)
+    def test_token_bucket_allows_burst(self):
+        self.assertEqual([allow_comment(self.user.id) for _ in range(4)], [True, True, True, False])
+        # Other users have their own buckets
+        self.assertTrue(allow_comment(self.seller.id))
+
+    @override_settings(COMMENT_RATE_BURST=3, COMMENT_RATE_PER_MINUTE=60)
+    def test_token_bucket_refills(self):
+        # Empty bucket last used 2.5 seconds ago has got 2 tokens back (one per second)
+        cache.set(f"comment_bucket:{self.user.id}", (0, time.time() - 2.5))
+        self.assertEqual([allow_comment(self.user.id) for _ in range(3)], [True, True, False])
+
+    def test_buffer_saves_when_full(self):
+        buffer = CommentBuffer(size=3, max_age=60)
+        self.addCleanup(buffer.flush)
+        for index in range(2):
+            buffer.add(Comment(auction=self.auction, user=self.user, comment=str(index)))
+        self.assertEqual(Comment.objects.count(), 0)
+
+        buffer.add(Comment(auction=self.auction, user=self.user, comment="2"))
+        self.assertEqual(Comment.objects.count(), 3)
+
+    def test_buffer_schedules_flush_of_lone_comment(self):
+        buffer = CommentBuffer(size=3, max_age=60)
+        buffer.add(Comment(auction=self.auction, user=self.user, comment="Comment"))
+        self.assertTrue(buffer._timer.is_alive())
+        self.assertEqual(buffer._timer.interval, 60)
+
+        buffer.flush()
+        self.assertIsNone(buffer._timer)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    @override_settings(COMMENT_BUFFER_SIZE=3, COMMENT_BUFFER_MAX_AGE=60)
+    def test_buffering_follows_settings_and_authors_see_own_comments(self):
+        self.addCleanup(comment_buffer.flush)
+        save_comment(Comment(auction=self.auction, user=self.user, comment="Comment"))
+
+        # Other readers do not empty the buffer
+        self.assertEqual(get_comments_page(self.auction.id, user_id=self.seller.id)[0], [])
+        self.assertEqual(get_comments_page(self.auction.id)[0], [])
+        comments, _ = get_comments_page(self.auction.id, user_id=self.user.id)
+        self.assertEqual([comment.comment for comment in comments], ["Comment"])
+
+    def test_comments_are_saved_directly_without_buffering(self):
+        save_comment(Comment(auction=self.auction, user=self.user, comment="Comment"))
+        self.assertEqual(Comment.objects.count(), 1)
+
+
+# ----------------------------------------------------------------------
+# ----------------------------  Bidding  -------------------------------
+# ----------------------------------------------------------------------
+class ProxyBiddingTests(TestCase):
+    """Resolution of competing proxy bids."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user("seller")
+        cls.first, cls.second, cls.third = (User.objects.create_user(name)
+                                            for name in ("first", "second", "third"))
+
+    def setUp(self):
+        self.auction = Auction.objects.create(seller=self.seller, title="Auction")
+
+    def bid(self, user, bid_price, max_price=None):
+        return place_bid(self.auction.id, user.id, Decimal(bid_price),
+                         Decimal(max_price) if max_price is not None else None)
+
+    def leader(self):
+        self.auction.refresh_from_db()
+        top = Bid.objects.filter(auction=self.auction).order_by("-bid_price", "bid_date").first()
+        self.assertEqual(top.bid_price, self.auction.current_price)
+        return top.user_id
+
+    def test_tie_goes_to_earlier_maximum(self):
+        self.bid(self.first, 10, 50)
+        self.bid(self.second, 20, 50)
+
+        self.assertEqual(self.leader(), self.first.id)
+        self.assertEqual(self.auction.current_price, Decimal(50))
+
+    def test_new_bidder_against_leaders_proxy(self):
+        self.bid(self.first, 10, 100)
+        new_bids = self.bid(self.second, 30)
+
+        self.assertEqual([(bid.user_id, bid.bid_price) for bid in new_bids],
+                         [(self.second.id, Decimal(30)), (self.first.id, Decimal(31))])
+        self.assertEqual(self.leader(), self.first.id)
+        self.assertTrue(NotificationEvent.objects.filter(user=self.second, auction=self.auction).exists())
+
+    def test_leader_raises_own_bid(self):
+        self.bid(self.first, 10, 50)
+        self.bid(self.second, 20)
+        self.assertEqual(self.leader(), self.first.id)
+        self.assertEqual(self.auction.current_price, Decimal(21))
+
+        self.bid(self.first, 30, 80)
+
+        self.assertEqual(self.leader(), self.first.id)
+        self.assertEqual(self.auction.current_price, Decimal(30))
+        self.assertEqual(ProxyBid.objects.get(auction=self.auction, user=self.first).max_price, Decimal(80))
+        self.assertFalse(NotificationEvent.objects.filter(user=self.first).exists())
+
+    def test_changed_maximum_resets_its_date(self):
+        self.bid(self.first, 10, 50)
+        self.bid(self.second, 20, 50)
+        created = ProxyBid.objects.get(auction=self.auction, user=self.second).created
+
+        self.bid(self.second, 51, 70)
+
+        self.assertGreater(ProxyBid.objects.get(auction=self.auction, user=self.second).created, created)
+        self.assertEqual(self.leader(), self.second.id)
+
+    def test_seller_and_small_bids_are_rejected(self):
+        self.bid(self.first, 10)
+        with self.assertRaises(BidError):
+            self.bid(self.seller, 20)
+        with self.assertRaises(BidError):
+            self.bid(self.second, 10)
+
+    # Time-series updates are not checked here and take most of the time
+    @mock.patch("auctions.bidding.record_bid")
+    def test_random_bids_follow_the_rule(self, _record_bid):
+        """Random bids with and without maximums on many auctions, checked after
+        every bid against a model of the rule that knows all proxies."""
+        bidders = [self.first, self.second, self.third]
+
+        # 300 auctions with 8 bids each, split over a few fixed seeds
+        for seed in range(3):
+            rng = random.Random(seed)
+            for _ in range(100):
+                self.auction = Auction.objects.create(seller=self.seller, title="Auction")
+                model = ProxyAuctionModel(Decimal(str(settings.PROXY_BID_INCREMENT)))
+                price = Decimal(0)
+                for _ in range(8):
+                    bidder = rng.choice(bidders)
+                    bid_price = price + rng.randint(1, 10)
+                    max_price = bid_price + rng.randint(0, 30) if rng.random() < 0.6 else None
+
+                    new_bids = self.bid(bidder, bid_price, max_price)
+                    leader, price = model.bid(bidder.id, bid_price, max_price)
+                    with self.subTest(seed=seed, auction=self.auction.id, bids=model.step):
+                        self.assertEqual((new_bids[-1].user_id, new_bids[-1].bid_price), (leader, price))
+                        self.assertEqual(self.leader(), leader)
+                        self.assertEqual(self.auction.current_price, price)
+
+                prices = list(Bid.objects.filter(auction=self.auction).order_by("id")
+                                         .values_list("bid_price", flat=True))
+                self.assertEqual(prices, sorted(set(prices)), "prices only rise")
+                for proxy in ProxyBid.objects.filter(auction=self.auction):
+                    self.assertGreaterEqual(proxy.max_price, price)
+                    if proxy.user_id != leader:
+                        self.assertEqual(proxy.max_price, price, "outbid proxy stays above price")
+
+
+class ProxyAuctionModel:
+    """Reference model of proxy bidding on one auction: all maximums are
+    compared, the highest wins and the earliest one wins a tie; the winner
+    pays one increment over the runner-up (at most own maximum, at least own bid).
+    Dates are replaced by numbers of bids placed so far.
+    """
+    def __init__(self, increment):
+        self.increment = increment
+        self.step = 0
+        self.proxies = {}
+        self.leader = None
+        self.price = Decimal(0)
+        self.leader_since = None
+
+    def bid(self, user_id, bid_price, max_price=None):
+        """Returns (leader, price) after the bid."""
+        self.step += 1
+        if max_price is not None:
+            current = self.proxies.get(user_id)
+            if current is None or current[0] != max_price:
+                self.proxies[user_id] = (max_price, self.step)
+
+        # Best maximum of every user - the earliest one among equal maximums
+        candidates = [(user_id, max_price or bid_price, self.step)]
+        if self.leader is not None:
+            candidates.append((self.leader, self.price, self.leader_since))
+        candidates.extend((proxy_user, proxy_max, since) for proxy_user, (proxy_max, since) in self.proxies.items())
+        best = {}
+        for candidate_user, candidate_max, since in sorted(candidates, key=lambda c: (-c[1], c[2])):
+            best.setdefault(candidate_user, (candidate_max, since))
+        ranking = sorted(best.items(), key=lambda item: (-item[1][0], item[1][1]))
+
+        winner, (winner_max, _) = ranking[0]
+        if len(ranking) > 1:
+            price = min(winner_max, ranking[1][1][0] + self.increment)
+        else:
+            price = bid_price
+        if winner == user_id:
+            price = max(price, bid_price)
+
+        # Every accepted bid saves a new top bid
+        self.leader, self.price, self.leader_since = winner, price, self.step
+        self.proxies = {proxy_user: proxy for proxy_user, proxy in self.proxies.items() if proxy[0] >= price}
+        return winner, price
+
+
+# ----------------------------------------------------------------------
+# -------------------------  Recommendations  --------------------------
+# ----------------------------------------------------------------------
+class RecommendationTests(TestCase):
+    def test_similarities_are_cosine_ranked(self):
+        similarities = compute_similarities({1: {10, 11}, 2: {10, 11}, 3: {10, 12}}, neighbours=5)
+
+        self.assertEqual([similar for similar, _ in similarities[10]], [11, 12])
+        self.assertAlmostEqual(similarities[10][0][1], 2 / math.sqrt(3 * 2))
+        self.assertAlmostEqual(similarities[12][0][1], 1 / math.sqrt(3))
+        self.assertEqual(len(compute_similarities({1: {10, 11, 12}}, neighbours=1)[10]), 1)
+
+    def test_long_histories_are_trimmed(self):
+        similarities = compute_similarities({1: {1, 2, 3, 4, 5}}, neighbours=5, max_items_per_user=2)
+        self.assertEqual(similarities, {4: [(5, 1.0)], 5: [(4, 1.0)]})
+
+    def test_recommendations_skip_own_closed_and_seen_auctions(self):
+        similarities = {10: [(11, 0.9), (14, 0.8), (13, 0.7), (12, 0.5)], 13: [(12, 0.6)]}
+        # Auction 14 is closed, auction 11 is sold by user 1
+        auctions = {10: 9, 11: 1, 12: 9, 13: 9}
+
+        recommendations = compute_recommendations({1: {10}, 2: {10, 13}}, similarities, auctions, limit=5)
+
+        self.assertEqual(recommendations[1], [13, 12])
+        # Scores of all user's auctions are summed up
+        self.assertEqual(recommendations[2], [12, 11])
+        self.assertEqual(compute_recommendations({2: {10, 13}}, similarities, auctions, limit=1)[2], [12])
+
+    def test_command_warms_shared_cache(self):
+        seller, first, second = (User.objects.create_user(name) for name in ("seller", "first", "second"))
+        auctions = [Auction.objects.create(seller=seller, title=f"Auction {index}") for index in range(3)]
+        for user in (first, second):
+            Bid.objects.create(auction=auctions[0], user=user, bid_price=Decimal(10))
+        Watchlist.objects.create(auction=auctions[1], user=first)
+        cache.delete(_cache_key(second.id))
+
+        call_command("build_recommendations", stdout=StringIO())
+
+        self.assertEqual(cache.get(_cache_key(second.id)), [auctions[1].id])
+        with self.assertNumQueries(2):
+            self.assertEqual(recommended_auctions(second.id), [auctions[1]])
+
+    @override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+    def test_command_warns_about_local_cache(self):
+        stderr = StringIO()
+        call_command("build_recommendations", stdout=StringIO(), stderr=stderr)
+        self.assertIn("local to this process", stderr.getvalue())
+
+
+# ----------------------------------------------------------------------
+# ---------------------------  Time series  ----------------------------
+# ----------------------------------------------------------------------
+class BidRollupTests(TestCase):
+    """Rollups fed from the bid path, trending feed and compaction."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user("seller")
+        cls.first, cls.second = (User.objects.create_user(name) for name in ("first", "second"))
+        cls.auction, cls.other = (Auction.objects.create(seller=cls.seller, title=title, category=Auction.ELECTRONICS)
+                                  for title in ("Auction", "Other"))
+
+    def record(self, auction, user, price, date):
+        """Saves bid with given date and feeds it to rollups."""
+        bid = Bid.objects.create(auction=auction, user=user, bid_price=Decimal(price))
+        Bid.objects.filter(pk=bid.pk).update(bid_date=date)
+        bid.bid_date = date
+        record_bid(bid, auction.category)
+
+    def rollup(self, resolution, auction=None):
+        rollups = BidRollup.objects.filter(resolution=resolution, category=Auction.ELECTRONICS)
+        rollup = rollups.get(auction=auction) if auction else rollups.get(auction__isnull=True)
+        return rollup.bid_count, rollup.max_price, rollup.unique_bidders
+
+    def test_counts_and_unique_bidders(self):
+        date = datetime(2026, 1, 10, 10, 15, 30, tzinfo=dt_timezone.utc)
+        self.record(self.auction, self.first, 10, date)
+        self.record(self.auction, self.second, 12, date + timedelta(seconds=5))
+        # Repeated bid of the same bidder
+        self.record(self.auction, self.first, 11, date + timedelta(seconds=10))
+        # The same bidder on other auction of the same category
+        self.record(self.other, self.first, 20, date + timedelta(seconds=20))
+
+        for resolution in (BidRollup.MINUTE, BidRollup.HOUR):
+            with self.subTest(resolution=resolution):
+                self.assertEqual(self.rollup(resolution, self.auction), (3, Decimal(12), 2))
+                self.assertEqual(self.rollup(resolution, self.other), (1, Decimal(20), 1))
+                self.assertEqual(self.rollup(resolution), (4, Decimal(20), 2))
+        self.assertEqual(BidRollup.objects.filter(resolution=BidRollup.MINUTE, bucket=date.replace(second=0))
+                                          .count(), 3)
+
+    def test_new_bucket_counts_bidders_again(self):
+        date = datetime(2026, 1, 10, 10, 59, 50, tzinfo=dt_timezone.utc)
+        self.record(self.auction, self.first, 10, date)
+        self.record(self.auction, self.first, 11, date + timedelta(seconds=20))
+
+        hours = BidRollup.objects.filter(resolution=BidRollup.HOUR, auction=self.auction).order_by("bucket")
+        self.assertEqual([(rollup.bid_count, rollup.unique_bidders) for rollup in hours], [(1, 1), (1, 1)])
+
+    def test_trending_auctions(self):
+        closed = Auction.objects.create(seller=self.seller, title="Closed", closed=True)
+        now = timezone.now()
+        for auction, bids, hours_ago in ((self.auction, 3, 1), (self.other, 1, 0), (closed, 5, 0),
+                                         (self.other, 10, 48)):
+            BidRollup.objects.create(auction=auction, category=auction.category, resolution=BidRollup.HOUR,
+                                     bucket=now.replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours_ago),
+                                     bid_count=bids, max_price=Decimal(10), unique_bidders=1)
+
+        self.assertEqual(trending_auctions(limit=5, hours=24), [self.auction, self.other])
+
+    def test_compaction_merges_hours_into_existing_day(self):
+        now = datetime(2026, 3, 1, 12, tzinfo=dt_timezone.utc)
+        day = datetime(2026, 1, 10, tzinfo=dt_timezone.utc)
+
+        def create(resolution, bucket, bids, price, bidders, auction=self.auction):
+            BidRollup.objects.create(auction=auction, category=Auction.ELECTRONICS, resolution=resolution,
+                                     bucket=bucket, bid_count=bids, max_price=Decimal(price),
+                                     unique_bidders=bidders)
+
+        create(BidRollup.DAY, day, 4, 6, 3)
+        create(BidRollup.HOUR, day + timedelta(hours=10), 2, 5, 2)
+        create(BidRollup.HOUR, day + timedelta(hours=11), 3, 7, 1)
+        create(BidRollup.HOUR, day + timedelta(hours=11), 5, 9, 2, auction=None)
+        # Recent buckets stay, old minute buckets are dropped
+        create(BidRollup.HOUR, now - timedelta(days=1), 1, 1, 1)
+        create(BidRollup.MINUTE, now - timedelta(hours=1), 1, 1, 1)
+        create(BidRollup.MINUTE, day + timedelta(hours=10), 2, 5, 2)
+
+        self.assertEqual(compact(now, batch_size=2), (1, 3))
+        self.assertEqual(self.rollup(BidRollup.DAY, self.auction), (9, Decimal(7), 3))
+        self.assertEqual(self.rollup(BidRollup.DAY), (5, Decimal(9), 2))
+        self.assertEqual(BidRollup.objects.filter(resolution=BidRollup.HOUR).count(), 1)
+        self.assertEqual(BidRollup.objects.filter(resolution=BidRollup.MINUTE).count(), 1)
+
+
+# ----------------------------------------------------------------------
+# -------------------------  Notifications  ----------------------------
+# ----------------------------------------------------------------------
+class NotificationQueueTests(TestCase):
+    def test_exhausted_events_are_not_claimed(self):
+        seller = User.objects.create_user("seller")
+        auction = Auction.objects.create(seller=seller, title="Auction")
+        for attempts in (0, settings.NOTIFICATION_MAX_ATTEMPTS):
+            NotificationEvent.objects.create(kind=NotificationEvent.AUCTION_CLOSED, auction=auction,
+                                             dedup_key=f"test:{attempts}", attempts=attempts,
+                                             available_at=timezone.now())
+
+        self.assertEqual([event.dedup_key for event in claim(10)], ["test:0"])
+
+
+# ----------------------------------------------------------------------
+# ----------------------------  Archive  -------------------------------
+# ----------------------------------------------------------------------
+class ArchiveTests(TestCase):
+    """Moving old closed auctions to archive tables and reading them back."""
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user("seller", password="password")
+        cls.first, cls.second = (User.objects.create_user(name, password="password")
+                                 for name in ("first", "second"))
+        cls.old = timezone.now() - timedelta(days=settings.ARCHIVE_AFTER_DAYS + 1)
+
+    def create_auction(self, closed=True, closed_date=None, publication_date=None):
+        auction = Auction.objects.create(seller=self.seller, title="Auction", closed=closed,
+                                         closed_date=closed_date)
+        if publication_date is not None:
+            Auction.objects.filter(pk=auction.pk).update(publication_date=publication_date)
+        return auction
+
+    def create_bid(self, auction, user, price, date):
+        bid = Bid.objects.create(auction=auction, user=user, bid_price=Decimal(price))
+        Bid.objects.filter(pk=bid.pk).update(bid_date=date)
+        return bid
+
+    def test_archivable_falls_back_to_publication_date(self):
+        recent = timezone.now() - timedelta(days=1)
+        archived = [self.create_auction(closed_date=self.old),
+                    self.create_auction(publication_date=self.old)]
+        # Open, closed recently, and closed without date but published recently
+        self.create_auction(closed=False, publication_date=self.old)
+        self.create_auction(closed_date=recent, publication_date=self.old)
+        self.create_auction()
+
+        self.assertCountEqual(archivable(), archived)
+
+    def test_auction_bids_and_comments_are_moved(self):
+        auction = self.create_auction(closed_date=self.old)
+        bids = [self.create_bid(auction, user, price, self.old) for user, price in ((self.first, 10), (self.second, 20))]
+        comment = Comment.objects.create(auction=auction, user=self.first, comment="Comment")
+        open_auction = self.create_auction(closed=False)
+        self.create_bid(open_auction, self.first, 5, self.old)
+
+        self.assertEqual(archive(), 1)
+
+        self.assertFalse(Auction.objects.filter(pk=auction.pk).exists())
+        self.assertEqual(ArchivedAuction.objects.get(pk=auction.pk).current_price, auction.current_price)
+        self.assertCountEqual(ArchivedBid.objects.filter(auction=auction.pk).values_list("id", flat=True),
+                              [bid.id for bid in bids])
+        self.assertEqual(ArchivedComment.objects.get(pk=comment.pk).comment, "Comment")
+        self.assertEqual(list(Bid.objects.values_list("auction", flat=True)), [open_auction.id])
+        self.assertFalse(Comment.objects.exists())
+
+    def test_winner_is_highest_and_earliest_bid(self):
+        auction = self.create_auction(closed_date=self.old)
+        self.create_bid(auction, self.first, 10, self.old)
+        self.create_bid(auction, self.second, 30, self.old + timedelta(minutes=1))
+        self.create_bid(auction, self.first, 30, self.old + timedelta(minutes=2))
+        no_bids = self.create_auction(closed_date=self.old)
+
+        archive()
+
+        self.assertEqual(ArchivedAuction.objects.get(pk=auction.pk).winner, self.second)
+        self.assertIsNone(ArchivedAuction.objects.get(pk=no_bids.pk).winner)
+
+    def test_rollups_and_inbox_links_are_kept(self):
+        auction = self.create_auction(closed_date=self.old)
+        BidRollup.objects.create(auction=auction, category=auction.category, resolution=BidRollup.DAY,
+                                 bucket=self.old, bid_count=1, max_price=Decimal(10), unique_bidders=1)
+        Notification.objects.create(user=self.first, auction=auction, message="Closed", event_key="closed")
+        Watchlist.objects.create(auction=auction, user=self.first)
+
+        archive()
+
+        self.assertEqual(BidRollup.objects.get(resolution=BidRollup.DAY).auction_id, auction.id)
+        self.assertEqual(Notification.objects.get().auction_id, auction.id)
+        self.assertFalse(Watchlist.objects.exists())
+
+    def test_archived_auction_is_shown_to_seller_and_winner(self):
+        auction = self.create_auction(closed_date=self.old)
+        self.create_bid(auction, self.first, 10, self.old)
+        archive()
+        url = reverse("auctions:listing_page", kwargs={"auction_id": auction.id})
+
+        self.client.login(username="seller", password="password")
+        self.assertTemplateUsed(self.client.get(url), "auctions/sold.html")
+        self.assertEqual([sold.id for sold in self.client.get(reverse("auctions:user_panel")).context["sold"]],
+                         [auction.id])
+
+        self.client.login(username="first", password="password")
+        self.assertTemplateUsed(self.client.get(url), "auctions/bought.html")
+        self.assertEqual([won.id for won in self.client.get(reverse("auctions:user_panel")).context["won"]],
+                         [auction.id])
+
+        self.client.login(username="second", password="password")
+        self.assertNotContains(self.client.get(url), auction.title)
+
+
+# ----------------------------------------------------------------------
+# -----------------------------  Batch  --------------------------------
+# ----------------------------------------------------------------------
+class BatchBidTests(TestCase):
+    def test_only_integral_auction_ids_are_accepted(self):
+        seller = User.objects.create_user("seller")
+        bidder = User.objects.create_user("bidder")
+        auction = Auction.objects.create(seller=seller, title="Auction")
+        self.client.force_login(bidder)
+
+        # JSON true would be read as auction 1 by int() - the first auction in a fresh database
+        auction_ids = [True, 1.5, "abc", None, 1e30, 10 ** 30, -auction.id, 0, float("inf"),
+                       float(auction.id), str(auction.id)]
+        body = json.dumps({"operations": [{"auction_id": auction_id, "bid_price": f"{index + 1}.00"}
+                                          for index, auction_id in enumerate(auction_ids)]})
+        response = self.client.post(reverse("auctions:batch_bid"), body, content_type="application/json")
+
+        self.assertEqual([result["ok"] for result in response.json()["results"]],
+                         [False] * 9 + [True, True])
+
+
+class BatchWatchlistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.seller = User.objects.create_user("seller")
+        cls.user = User.objects.create_user("user")
+        cls.auctions = [Auction.objects.create(seller=cls.seller, title=f"Auction {index}") for index in range(2)]
+
+    def post(self, operations):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse("auctions:batch_watchlist"), json.dumps({"operations": operations}),
+                                    content_type="application/json")
+        return response.json()["results"]
+
+    def test_watch_adds_and_removes(self):
+        first, second = (auction.id for auction in self.auctions)
+        Watchlist.objects.create(auction_id=second, user=self.user)
+
+        results = self.post([{"auction_id": first, "watch": True}, {"auction_id": second, "watch": False},
+                             {"auction_id": first, "watch": True}])
+
+        self.assertEqual([(result["ok"], result.get("on_watchlist")) for result in results],
+                         [(True, True), (True, False), (False, None)])
+        self.assertEqual(list(Watchlist.objects.values_list("auction", flat=True)), [first])
+
+    def test_only_booleans_are_accepted(self):
+        auction_id = self.auctions[0].id
+        Watchlist.objects.create(auction_id=auction_id, user=self.user)
+
+        results = self.post([{"auction_id": auction_id}, {"auction_id": auction_id, "watch": "false"},
+                             {"auction_id": auction_id, "watch": 0}, {"auction_id": auction_id, "watch": None}])
+
+        self.assertEqual({result["error"] for result in results}, {"Watch must be true or false"})
+        self.assertTrue(Watchlist.objects.filter(auction_id=auction_id, user=self.user).exists())
@@ -0,0 +1,172 @@
+"""Contains bid activity time-series: incremental rollups fed from the bid
+path, trending auctions feed and compaction of old buckets."""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import DecimalField, F, Max, Sum, Value
+from django.db.models.functions import Cast, Greatest, TruncDay
+from django.utils import timezone
+
+from .models import Auction, Bid, BidRollup
+
+# ----------------------------------------------------------------------
+# -----------------------------  Buckets  ------------------------------
+# ----------------------------------------------------------------------
+def truncate(date, resolution):
+    """Returns start of the bucket that contains given date."""
+    date = date.replace(second=0, microsecond=0)
+    if resolution in (BidRollup.HOUR, BidRollup.DAY):
+        date = date.replace(minute=0)
+    if resolution == BidRollup.DAY:
+        date = date.replace(hour=0)
+    return date
+
+def _price(value):
+    """Returns price as SQL decimal so that it is compared as a number."""
+    return Cast(Value(value), DecimalField(max_digits=11, decimal_places=2))
+
+def _scope(auction_id, category):
+    """Returns filter for auction's rollups or category's rollups if auction is None."""
+    if auction_id is None:
+        return {"auction__isnull": True, "category": category}
+    return {"auction_id": auction_id}
+
+def _increment(auction_id, category, resolution, bucket, price, new_bidder):
+    """Adds single bid to the bucket - creates the bucket if it does not exist yet."""
+    rollups = BidRollup.objects.filter(resolution=resolution, bucket=bucket, **_scope(auction_id, category))
+    changes = {
+        "bid_count": F("bid_count") + 1,
+        "max_price": Greatest(F("max_price"), _price(price)),
+        "unique_bidders": F("unique_bidders") + int(new_bidder)
+    }
+
+    if rollups.update(**changes):
+        return
+
+    try:
+        with transaction.atomic():
+            BidRollup.objects.create(
+                auction_id=auction_id,
+                category=category,
+                resolution=resolution,
+                bucket=bucket,
+                bid_count=1,
+                max_price=price,
+                unique_bidders=1
+            )
+    # Other request created the bucket in the meantime
+    except IntegrityError:
+        rollups.update(**changes)
+
+def record_bid(bid, category):
+    """Feeds new bid into minute and hour rollups of its auction and category."""
+    for resolution in (BidRollup.MINUTE, BidRollup.HOUR):
+        bucket = truncate(bid.bid_date, resolution)
+        earlier_bids = Bid.objects.filter(
+            user=bid.user_id,
+            bid_date__gte=bucket,
+            bid_date__lte=bid.bid_date
+        ).exclude(pk=bid.pk)
+
+        new_auction_bidder = not earlier_bids.filter(auction=bid.auction_id).exists()
+        _increment(bid.auction_id, category, resolution, bucket, bid.bid_price, new_auction_bidder)
+
+        new_category_bidder = new_auction_bidder and not earlier_bids.filter(auction__category=category).exists()
+        _increment(None, category, resolution, bucket, bid.bid_price, new_category_bidder)
+
+# ----------------------------------------------------------------------
+# -----------------------------  Queries  ------------------------------
+# ----------------------------------------------------------------------
+def trending_auctions(limit=None, hours=None):
+    """Returns open auctions with the most bids in the last hours,
+    based only on hourly rollups.
+    """
+    if limit is None:
+        limit = settings.TRENDING_LIMIT
+    if hours is None:
+        hours = settings.TRENDING_WINDOW_HOURS
+
+    since = truncate(timezone.now() - timedelta(hours=hours), BidRollup.HOUR)
+    activity = dict(BidRollup.objects.filter(
+        resolution=BidRollup.HOUR,
+        bucket__gte=since,
+        auction__isnull=False,
+        auction__closed=False
+    ).values("auction").annotate(bids=Sum("bid_count")).order_by("-bids").values_list("auction", "bids")[:limit])
+
+    auctions = Auction.objects.filter(id__in=activity)
+    return sorted(auctions, key=lambda auction: activity[auction.id], reverse=True)
+
+# ----------------------------------------------------------------------
+# ----------------------------  Compaction  ----------------------------
+# ----------------------------------------------------------------------
+def compact(now=None, batch_size=1000):
+    """Downsamples old buckets:
+        * minute buckets older than ROLLUP_MINUTE_RETENTION_HOURS are dropped
+          (the same bids are already counted in hour buckets)
+        * hour buckets older than ROLLUP_HOUR_RETENTION_DAYS are merged into day buckets
+
+    Unique bidders of a day bucket is the highest hourly value - bidders
+    cannot be deduplicated across hours once raw bids are not read.
+    Returns number of deleted minute and hour buckets.
+    """
+    if now is None:
+        now = timezone.now()
+
+    minute_limit = truncate(now - timedelta(hours=settings.ROLLUP_MINUTE_RETENTION_HOURS), BidRollup.HOUR)
+    hour_limit = truncate(now - timedelta(days=settings.ROLLUP_HOUR_RETENTION_DAYS), BidRollup.DAY)
+
+    deleted_minutes = 0
+    while True:
+        ids = list(BidRollup.objects.filter(
+            resolution=BidRollup.MINUTE,
+            bucket__lt=minute_limit
+        ).values_list("id", flat=True)[:batch_size])
+        if not ids:
+            break
+        deleted_minutes += BidRollup.objects.filter(id__in=ids).delete()[0]
+
+    deleted_hours = 0
+    while True:
+        with transaction.atomic():
+            ids = list(BidRollup.objects.filter(
+                resolution=BidRollup.HOUR,
+                bucket__lt=hour_limit
+            ).values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+
+            days = (BidRollup.objects.filter(id__in=ids)
+                                     .annotate(day=TruncDay("bucket"))
+                                     .values("auction", "category", "day")
+                                     .annotate(bids=Sum("bid_count"),
+                                               price=Max("max_price"),
+                                               bidders=Max("unique_bidders")))
+            for day in days:
+                _merge_day(day)
+
+            deleted_hours += BidRollup.objects.filter(id__in=ids).delete()[0]
+
+    return deleted_minutes, deleted_hours
+
+def _merge_day(day):
+    """Adds aggregated hour buckets to the day bucket."""
+    rollups = BidRollup.objects.filter(resolution=BidRollup.DAY, bucket=day["day"],
+                                       **_scope(day["auction"], day["category"]))
+    updated = rollups.update(
+        bid_count=F("bid_count") + day["bids"],
+        max_price=Greatest(F("max_price"), _price(day["price"])),
+        unique_bidders=Greatest(F("unique_bidders"), day["bidders"])
+    )
+    if not updated:
+        BidRollup.objects.create(
+            auction_id=day["auction"],
+            category=day["category"],
+            resolution=BidRollup.DAY,
+            bucket=day["day"],
+            bid_count=day["bids"],
+            max_price=day["price"],
+            unique_bidders=day["bidders"]
+        )
@@ -14,8 +14,12 @@ urlpatterns = [
     path("<int:auction_id>", views.listing_page, name="listing_page"),
     path("watchlist", views.watchlist, name="watchlist"),
     path("bid", views.bid, name="bid"),
+    path("batch/bid", views.batch_bid, name="batch_bid"),
+    path("batch/watchlist", views.batch_watchlist, name="batch_watchlist"),
+    path("inbox", views.inbox, name="inbox"),
     path("categories", views.categories, name="categories"),
     path("categories/<str:category>", views.categories, name="categories"),
     path("close_auction/<str:auction_id>", views.close_auction, name="close_auction"),
-    path("handle_comment/<str:auction_id>", views.handle_comment, name="handle_comment")
+    path("handle_comment/<str:auction_id>", views.handle_comment, name="handle_comment"),
+    path("comments/<int:auction_id>", views.comments, name="comments")
 ]
@@ -1,17 +1,26 @@
 """Contains implementation of all views used in this app"""
 
+import json
+
+from django.conf import settings
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
-from django.http import HttpResponse, HttpResponseRedirect
+from django.http import HttpResponse, HttpResponseRedirect, JsonResponse
 from django.shortcuts import render
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 from django import forms
 # Error exceptions
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 
-from .models import User, Auction, Bid, Comment, Watchlist
+from .models import User, Auction, Bid, Comment, Watchlist, ProxyBid, Notification, ArchivedAuction
+from .bidding import BidError, place_bid, resolve_bid
+from .comments import get_comments_page, decode_cursor, serialize_comment, allow_comment, save_comment
+from .timeseries import trending_auctions
+from .recommendations import recommended_auctions, refresh_user
+from .notifications import enqueue_auctions_closed
 
 # ----------------------------------------------------------------------
 # ------------------------------  Forms  -------------------------------
@@ -42,6 +51,14 @@ class CreateListingForm(forms.ModelForm):
 
 class BidForm(forms.ModelForm):
     """Creates form for Bid model."""
+    max_price = forms.DecimalField(label="", required=False, max_digits=11, decimal_places=2,
+                                   widget=forms.NumberInput(attrs={
+                                        "placeholder": "Max bid (optional) - we bid for you up to it",
+                                        "min": 0.01,
+                                        "max": 100000000000,
+                                        "class": "form-control mt-2"
+                                    }))
+
     class Meta:
         model = Bid
         fields = ["bid_price"]
@@ -81,8 +98,16 @@ def index(request):
     # Get all auctions descending
     auctions = Auction.objects.filter(closed=False).order_by("-publication_date")
 
+    # Personalized feed only for logged in users
+    if request.user.is_authenticated:
+        recommended = recommended_auctions(request.user.id)
+    else:
+        recommended = []
+
     return render(request, "auctions/index.html", {
-        "auctions": auctions
+        "auctions": auctions,
+        "trending": trending_auctions(),
+        "recommended": recommended
     })
 
 @login_required(login_url="auctions:login")
@@ -100,8 +125,9 @@ def user_panel(request):
     # Get auctions currently being sold by the user
     selling = Auction.objects.filter(closed=False, seller=request.user.id).order_by("-publication_date").all()
 
-    # Get auction sold by the user
-    sold = Auction.objects.filter(closed=True, seller=request.user.id).order_by("-publication_date").all()
+    # Get auction sold by the user - recently closed first, then archived ones
+    sold = list(Auction.objects.filter(closed=True, seller=request.user.id).order_by("-publication_date"))
+    sold += ArchivedAuction.objects.filter(seller=request.user.id).order_by("-publication_date")
 
     # Get auctions currently being bid by the user
     bidding = Auction.objects.filter(closed=False, id__in = all_distinct_bids).all()
@@ -113,6 +139,9 @@ def user_panel(request):
         if highest_bid.user.id == request.user.id:
             won.append(auction)
 
+    # Archived auctions already know their winner
+    won += ArchivedAuction.objects.filter(winner=request.user.id).order_by("-publication_date")
+
     return render(request, "auctions/user_panel.html", {
         "selling": selling,
         "sold": sold,
@@ -150,16 +179,41 @@ def create_listing(request):
         "form": CreateListingForm(),
     })
 
+def closed_listing_page(request, auction, winner):
+    """Shows closed (or archived) auction only to the winner and the seller."""
+    if winner is not None:
+        # Diffrent view for winner, seller and other users
+        if request.user.id == auction.seller.id:
+            return render(request, "auctions/sold.html", {
+                "auction": auction,
+                "winner": winner
+            })
+        elif request.user.id == winner.id:
+            return render(request, "auctions/bought.html", {
+                "auction": auction
+            })
+    else:
+        if request.user.id == auction.seller.id:
+            return render(request, "auctions/closed_no_offer.html", {
+                "auction": auction
+            })
+
+    return HttpResponse("Error - auction no longer available")
+
 def listing_page(request, auction_id):
     """Listing Page view: shows detailed page of a single auction."""
-    # Get current auction if exists
+    # Get current auction if exists - old closed auctions are in the archive
     try:
         auction = Auction.objects.get(pk=auction_id)
     except Auction.DoesNotExist:
-        return render(request, "auctions/error_handling.html", {
-            "code": 404,
-            "message": "Auction id doesn't exist"
-        })
+        try:
+            archived = ArchivedAuction.objects.select_related("seller", "winner").get(pk=auction_id)
+        except ArchivedAuction.DoesNotExist:
+            return render(request, "auctions/error_handling.html", {
+                "code": 404,
+                "message": "Auction id doesn't exist"
+            })
+        return closed_listing_page(request, archived, archived.winner)
 
     # Get info about bids
     bid_amount = Bid.objects.filter(auction=auction_id).count()
@@ -167,26 +221,8 @@ def listing_page(request, auction_id):
 
     # Show auction only to the winner and the seller if closed
     if auction.closed:
-        if highest_bid is not None:
-            winner = highest_bid.user
-
-            # Diffrent view for winner, seller and other users
-            if request.user.id == auction.seller.id:
-                return render(request, "auctions/sold.html", {
-                    "auction": auction,
-                    "winner": winner
-                })
-            elif request.user.id == winner.id:
-                return render(request, "auctions/bought.html", {
-                    "auction": auction
-                })
-        else:
-            if request.user.id == auction.seller.id:
-                return render(request, "auctions/closed_no_offer.html", {
-                    "auction": auction
-                })
-
-        return HttpResponse("Error - auction no longer available")
+        winner = highest_bid.user if highest_bid is not None else None
+        return closed_listing_page(request, auction, winner)
     else:
          # If user logged in, check if auction already in watchlist
         if request.user.is_authenticated:
@@ -199,11 +235,15 @@ def listing_page(request, auction_id):
                 on_watchlist = True
             else:
                 on_watchlist = False
+
+            # Show user's hidden maximum bid
+            max_bid = ProxyBid.objects.filter(auction=auction_id, user=request.user.id).first()
         else:
             on_watchlist = False
+            max_bid = None
 
-        # Get all the comments
-        comments = Comment.objects.filter(auction=auction_id)
+        # Get first page of the comments - the rest is loaded on demand
+        comments, comments_cursor = get_comments_page(auction_id, user_id=request.user.id)
 
         # Check who has made the highest bid
         if highest_bid is not None:
@@ -219,7 +259,9 @@ def listing_page(request, auction_id):
             "bid_amount": bid_amount,
             "bid_message": bid_message,
             "on_watchlist": on_watchlist,
+            "max_bid": max_bid,
             "comments": comments,
+            "comments_cursor": comments_cursor,
             "bid_form": BidForm(),
             "comment_form": CommentForm()
         })
@@ -265,6 +307,9 @@ def watchlist(request):
                     "message": "Auction is already on your watchlist"
                 })
 
+        # Take watchlist change into account in user's recommendations
+        refresh_user(user.id)
+
         return HttpResponseRedirect("/" + auction_id)
 
 
@@ -275,56 +320,47 @@ def watchlist(request):
         "watchlist_items": watchlist_items
     })
 
+@login_required(login_url="auctions:login")
+def inbox(request):
+    """Inbox view: shows user's latest notifications and marks them as read."""
+    notifications = list(Notification.objects.filter(user=request.user.id)
+                                             .order_by("-created")[:settings.INBOX_SIZE])
+
+    Notification.objects.filter(user=request.user.id, read=False).update(read=True)
+
+    return render(request, "auctions/inbox.html", {
+        "notifications": notifications
+    })
+
 @login_required(login_url="auctions:login")
 def bid(request):
     """Bid view: only POST method allowed, handles bidding logic."""
     if request.method == "POST":
         form = BidForm(request.POST)
         if form.is_valid():
-            bid_price = float(form.cleaned_data["bid_price"])
+            bid_price = form.cleaned_data["bid_price"]
+            max_price = form.cleaned_data["max_price"]
             auction_id = request.POST.get("auction_id")
 
-            # Make sure that bid_price is positive
-            if bid_price <= 0:
-                return render(request, "auctions/error_handling.html", {
-                    "code": 400,
-                    "message": "Bid price must be greater than 0"
-                })
-
-            # # Make sure that auction exists
+            # Place bid and resolve it against other users' maximum bids
             try:
-                auction = Auction.objects.get(pk=auction_id)
-                user = User.objects.get(id=request.user.id)
+                new_bids = place_bid(auction_id, request.user.id, bid_price, max_price)
             except Auction.DoesNotExist:
                 return render(request, "auctions/error_handling.html", {
                     "code": 404,
                     "message": "Auction id doesn't exist"
                 })
-
-            # Make sure that bid is not made by the seller
-            if auction.seller == user:
+            except BidError as error:
                 return render(request, "auctions/error_handling.html", {
-                    "code": 400,
-                    "message": "Seller cannot bid"
+                    "code": error.code,
+                    "message": error.message
                 })
 
-            # Check if current bid is the highest / else save new bid
-            highest_bid = Bid.objects.filter(auction=auction).order_by('-bid_price').first()
-            if highest_bid is None or bid_price > highest_bid.bid_price:
-                # Add new bid to db
-                new_bid = Bid(auction=auction, user=user, bid_price=bid_price)
-                new_bid.save()
+            # Take new bids into account in bidders' recommendations
+            for new_bid in new_bids:
+                refresh_user(new_bid.user_id)
 
-                # Update current highest price
-                auction.current_price = bid_price
-                auction.save()
-
-                return HttpResponseRedirect("/" + auction_id)
-            else:
-                return render(request, "auctions/error_handling.html", {
-                    "code": 400,
-                    "message": "Youre bid is too small"
-                })
+            return HttpResponseRedirect("/" + auction_id)
         else:
             return render(request, "auctions/error_handling.html", {
                 "code": 400,
@@ -338,13 +374,10 @@ def bid(request):
 
 def categories(request, category=None):
     """Categories view: shows all categories and allowes filter auction by category."""
-    # Get all possible categories
-    categories_list = Auction.CATEGORY
-
     # Check if valid category as URL parameter
     if category is not None:
-        if category in [x[0] for x in categories_list]:
-            category_full = [x[1] for x in categories_list if x[0] == category][0]
+        if category in Auction.CATEGORY_NAMES:
+            category_full = Auction.CATEGORY_NAMES[category]
 
             # Get all auctions from this category
             auctions = Auction.objects.filter(category=category, closed=False)
@@ -376,10 +409,12 @@ def close_auction(request, auction_id):
             "message": "Auction id doesn't exist"
         })
 
-    # Close auction
+    # Close auction and let watchers know
     if request.method == "POST":
         auction.closed = True
+        auction.closed_date = timezone.now()
         auction.save()
+        enqueue_auctions_closed([auction])
     elif request.method == "GET":
         return render(request, "auctions/error_handling.html", {
             "code": 405,
@@ -403,6 +438,13 @@ def handle_comment(request, auction_id):
 
     # Post comment
     if request.method == "POST":
+        # Make sure that user is not flooding the auction
+        if not allow_comment(request.user.id):
+            return render(request, "auctions/error_handling.html", {
+                "code": 429,
+                "message": "You are commenting too fast, try again later"
+            })
+
         form = CommentForm(request.POST)
         if form.is_valid():
             # Get all data from the form
@@ -410,11 +452,11 @@ def handle_comment(request, auction_id):
 
             # Save a record
             comment = Comment(
-                user=User.objects.get(pk=request.user.id),
+                user_id=request.user.id,
                 comment = comment,
                 auction = auction
             )
-            comment.save()
+            save_comment(comment)
         else:
             return render(request, "auctions/error_handling.html", {
                 "code": 400,
@@ -429,6 +471,25 @@ def handle_comment(request, auction_id):
     # Redirect to auction page
     return HttpResponseRedirect("/" + auction_id)
 
+def comments(request, auction_id):
+    """Comments view: returns next page of auction's comments as JSON."""
+    # Comments are visible only as long as the auction is open
+    if not Auction.objects.filter(pk=auction_id, closed=False).exists():
+        return JsonResponse({"error": "Auction id doesn't exist"}, status=404)
+
+    cursor = request.GET.get("cursor")
+    if cursor is not None:
+        cursor = decode_cursor(cursor)
+        if cursor is None:
+            return JsonResponse({"error": "Cursor is invalid"}, status=400)
+
+    comments, next_cursor = get_comments_page(auction_id, cursor, user_id=request.user.id)
+
+    return JsonResponse({
+        "comments": [serialize_comment(comment) for comment in comments],
+        "cursor": next_cursor
+    })
+
 def login_view(request):
     """Login view: handles log in logic."""
     if request.method == "POST":
@@ -486,6 +547,175 @@ def register(request):
     else:
         return render(request, "auctions/register.html")
 
+# ----------------------------------------------------------------------
+# ---------------------------  Batch views  ----------------------------
+# ----------------------------------------------------------------------
+# Largest id that fits 64-bit signed integer column
+MAX_AUCTION_ID = 2 ** 63 - 1
+
+def read_operations(request):
+    """Returns list of operations from batch request's JSON body
+    or JsonResponse with an error.
+    """
+    if request.method != "POST":
+        return JsonResponse({"error": "Method Not Allowed"}, status=405)
+
+    try:
+        operations = json.loads(request.body)["operations"]
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"error": "Body must be JSON object with operations list"}, status=400)
+
+    if not isinstance(operations, list) or not all(isinstance(operation, dict) for operation in operations):
+        return JsonResponse({"error": "Operations must be a list of objects"}, status=400)
+    if len(operations) > settings.BATCH_MAX_OPERATIONS:
+        return JsonResponse({"error": f"At most {settings.BATCH_MAX_OPERATIONS} operations allowed"}, status=400)
+
+    return operations
+
+def operation_auction_id(operation):
+    """Returns operation's auction id as int or None if it is not a valid id.
+    JSON true/false and fractional numbers are rejected - int() would accept them,
+    so are ids out of database's integer range.
+    """
+    auction_id = operation.get("auction_id")
+    if isinstance(auction_id, bool):
+        return None
+    if isinstance(auction_id, float) and not auction_id.is_integer():
+        return None
+
+    try:
+        auction_id = int(auction_id)
+    except (TypeError, ValueError):
+        return None
+
+    return auction_id if 0 < auction_id <= MAX_AUCTION_ID else None
+
+def lock_auctions(operations):
+    """Returns dict: auction id -> auction for all operations' auctions,
+    read and locked with one query (in id order to avoid deadlocks).
+    """
+    auction_ids = {operation_auction_id(operation) for operation in operations} - {None}
+
+    return {auction.id: auction for auction in
+            Auction.objects.select_for_update().filter(id__in=auction_ids).order_by("id")}
+
+def find_auction(auctions, operation):
+    """Returns operation's auction or None if it doesn't exist."""
+    return auctions.get(operation_auction_id(operation))
+
+@login_required(login_url="auctions:login")
+def batch_bid(request):
+    """Batch Bid view: only POST method allowed, places many bids at once.
+
+    Body: {"operations": [{"auction_id": 1, "bid_price": "10.00", "max_price": "20.00"}, ...]}
+    ("max_price" is optional). All bids are applied in one transaction,
+    a failed bid does not affect the others. Returns result of every bid.
+    """
+    operations = read_operations(request)
+    if isinstance(operations, JsonResponse):
+        return operations
+
+    results = []
+    bidders = set()
+    with transaction.atomic():
+        auctions = lock_auctions(operations)
+
+        for operation in operations:
+            auction = find_auction(auctions, operation)
+            if auction is None:
+                results.append({"auction_id": operation.get("auction_id"), "ok": False,
+                                "error": "Auction id doesn't exist"})
+                continue
+
+            form = BidForm({"bid_price": operation.get("bid_price"), "max_price": operation.get("max_price")})
+            if not form.is_valid():
+                results.append({"auction_id": auction.id, "ok": False, "error": "Form is invalid"})
+                continue
+
+            try:
+                new_bids = resolve_bid(auction, request.user.id,
+                                       form.cleaned_data["bid_price"], form.cleaned_data["max_price"])
+            except BidError as error:
+                results.append({"auction_id": auction.id, "ok": False, "error": error.message})
+                continue
+
+            bidders.update(new_bid.user_id for new_bid in new_bids)
+            results.append({
+                "auction_id": auction.id,
+                "ok": True,
+                "current_price": f"{auction.current_price:.2f}",
+                "leading": new_bids[-1].user_id == request.user.id
+            })
+
+    # Take new bids into account in bidders' recommendations
+    for user_id in bidders:
+        refresh_user(user_id)
+
+    return JsonResponse({"results": results})
+
+@login_required(login_url="auctions:login")
+def batch_watchlist(request):
+    """Batch Watchlist view: only POST method allowed, adds and removes
+    many auctions from user's watchlist at once.
+
+    Body: {"operations": [{"auction_id": 1, "watch": true}, ...]}
+    (true adds the auction, false removes it - nothing else is accepted).
+    Returns result of every operation, "on_watchlist" tells the state after it.
+    """
+    operations = read_operations(request)
+    if isinstance(operations, JsonResponse):
+        return operations
+
+    results = []
+    with transaction.atomic():
+        auctions = lock_auctions(operations)
+        watched = set(Watchlist.objects.filter(user=request.user.id, auction__in=auctions)
+                                       .values_list("auction", flat=True))
+
+        to_add, to_remove = set(), set()
+        for operation in operations:
+            auction = find_auction(auctions, operation)
+            if auction is None:
+                results.append({"auction_id": operation.get("auction_id"), "ok": False,
+                                "error": "Auction id doesn't exist"})
+                continue
+
+            watch = operation.get("watch")
+            if not isinstance(watch, bool):
+                results.append({"auction_id": auction.id, "ok": False,
+                                "error": "Watch must be true or false"})
+                continue
+
+            # Apply operations in order on the set of watched auctions
+            if watch:
+                if auction.id in watched:
+                    results.append({"auction_id": auction.id, "ok": False,
+                                    "error": "Auction is already on your watchlist"})
+                    continue
+                watched.add(auction.id)
+            else:
+                if auction.id not in watched:
+                    results.append({"auction_id": auction.id, "ok": False,
+                                    "error": "Auction is not on your watchlist"})
+                    continue
+                watched.remove(auction.id)
+
+            results.append({"auction_id": auction.id, "ok": True, "on_watchlist": auction.id in watched})
+            (to_add if auction.id in watched else to_remove).add(auction.id)
+
+        # Auction both added and removed again ends up in both sets - final state wins
+        to_add &= watched
+        to_remove -= watched
+
+        Watchlist.objects.filter(user=request.user.id, auction__in=to_remove).delete()
+        Watchlist.objects.bulk_create([Watchlist(user_id=request.user.id, auction_id=auction_id)
+                                       for auction_id in to_add], ignore_conflicts=True)
+
+    # Take watchlist changes into account in user's recommendations
+    refresh_user(request.user.id)
+
+    return JsonResponse({"results": results})
+
 def handle_not_found(request, exception):
     return render(request, "auctions/error_handling.html", {
             "code": 404,
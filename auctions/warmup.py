@@ -0,0 +1,40 @@
+"""Contains warmup hook: fills worker's lazy caches before it accepts traffic."""
+
+import os
+
+from django.template import engines
+from django.urls import get_resolver, reverse
+
+from .models import Auction
+
+
+def template_names():
+    """Returns names of all app's templates."""
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+    names = []
+    for directory, _, files in os.walk(root):
+        for file_name in files:
+            if file_name.endswith(".html"):
+                names.append(os.path.relpath(os.path.join(directory, file_name), root).replace(os.sep, "/"))
+    return sorted(names)
+
+def warmup():
+    """Pre-loads URL resolvers, templates and category URLs.
+    Returns number of loaded templates.
+    """
+    # Build resolver and its reverse lookup tables (auctions/urls.py included)
+    resolver = get_resolver()
+    resolver.reverse_dict
+
+    # Category links are reversed on every page by the layout
+    reverse("auctions:index")
+    for code in Auction.CATEGORY_NAMES:
+        reverse("auctions:categories", kwargs={"category": code})
+
+    # Compiled templates are kept only by the cached loader (DEBUG = False)
+    engine = engines["django"]
+    names = template_names()
+    for name in names:
+        engine.get_template(name)
+
+    return len(names)
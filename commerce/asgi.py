@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'commerce.settings')
 
 application = get_asgi_application()
+
+# Fill lazy caches before the worker accepts traffic - app is loaded only now
+if settings.WARMUP_ON_START:
+    from auctions.warmup import warmup  # pylint: disable=wrong-import-position
+    warmup()
@@ -30,9 +30,11 @@ ALLOWED_HOSTS = []
 
 # Application definition
 
+# Admin can be left out of workers that serve only the site: COMMERCE_ADMIN=0
+ADMIN_ENABLED = os.environ.get('COMMERCE_ADMIN', '1') == '1'
+
 INSTALLED_APPS = [
     'auctions',
-    'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -40,6 +42,9 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 ]
 
+if ADMIN_ENABLED:
+    INSTALLED_APPS.insert(1, 'django.contrib.admin')
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -120,3 +125,99 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/3.0/howto/static-files/
 
 STATIC_URL = '/static/'
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+# Comment rate limiting and recommendations keep state in cache, so it must be
+# shared by all workers and management commands - local memory cache is per process.
+# Database cache table is created with: python manage.py createcachetable
+# Memcached or redis can replace it under higher load.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'commerce_cache',
+    }
+}
+
+
+# Comments
+# Number of comments loaded at once on listing page
+COMMENT_PAGE_SIZE = 20
+
+# Token bucket per user: burst size and refill rate
+COMMENT_RATE_BURST = 5
+COMMENT_RATE_PER_MINUTE = 10
+
+# Comments are inserted in batches of COMMENT_BUFFER_SIZE (1 disables buffering);
+# buffer is flushed anyway if the oldest comment waits COMMENT_BUFFER_MAX_AGE seconds.
+# Authors see their own buffered comments at once, everybody else after the flush.
+# Buffered comments are lost if the worker is killed before the flush.
+COMMENT_BUFFER_SIZE = 1
+COMMENT_BUFFER_MAX_AGE = 2
+
+
+# Bid activity rollups
+# Minute buckets are kept for ROLLUP_MINUTE_RETENTION_HOURS,
+# hour buckets are merged into day buckets after ROLLUP_HOUR_RETENTION_DAYS
+ROLLUP_MINUTE_RETENTION_HOURS = 48
+ROLLUP_HOUR_RETENTION_DAYS = 30
+
+# Trending auctions on main page: how many and from how many last hours
+TRENDING_LIMIT = 8
+TRENDING_WINDOW_HOURS = 24
+
+
+# Recommendations
+# Similar auctions stored per auction and auctions shown per user
+RECOMMENDATION_NEIGHBOURS = 20
+RECOMMENDATION_LIMIT = 8
+
+# Only latest auctions of very active users are used to build similarities
+# and recommendations
+RECOMMENDATION_MAX_ITEMS_PER_USER = 200
+
+# Seconds user's recommendations are kept in cache - build_recommendations
+# warms them for all users, so it should run more often than that
+RECOMMENDATION_CACHE_TIMEOUT = 60 * 60
+
+
+# Bidding
+# Proxy bids outbid each other by this amount, capped at their maximum
+PROXY_BID_INCREMENT = 1
+
+
+# Notifications
+# Events claimed by a worker at once and seconds before a claimed event is retried
+NOTIFICATION_BATCH_SIZE = 100
+NOTIFICATION_LEASE_SECONDS = 60
+
+# Failed delivery is retried after NOTIFICATION_RETRY_SECONDS, doubled every attempt
+NOTIFICATION_RETRY_SECONDS = 30
+NOTIFICATION_MAX_ATTEMPTS = 5
+
+# Any Django email backend can be used to send notifications
+NOTIFICATION_EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+NOTIFICATION_EMAIL_FROM = 'auctions@example.com'
+
+# Number of latest notifications shown in inbox
+INBOX_SIZE = 50
+
+
+# Startup
+# Pre-load URL resolvers and templates when worker starts: COMMERCE_WARMUP=0 disables it.
+# Database connection is not opened - it is per thread, closed after every request
+# with CONN_MAX_AGE = 0 and must not be inherited by workers forked with --preload.
+WARMUP_ON_START = os.environ.get('COMMERCE_WARMUP', '1') == '1'
+
+
+# Archive
+# Closed auctions are moved to archive tables that many days after closing
+ARCHIVE_AFTER_DAYS = 30
+ARCHIVE_BATCH_SIZE = 500
+
+
+# Batch endpoints
+# Maximum number of operations in one batch request
+BATCH_MAX_OPERATIONS = 100
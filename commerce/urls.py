@@ -13,12 +13,16 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.conf import settings
 from django.urls import include, path
 
 urlpatterns = [
-    path("admin/", admin.site.urls),
     path("", include("auctions.urls"))
 ]
 
+# Admin is not loaded on workers that do not serve it
+if settings.ADMIN_ENABLED:
+    from django.contrib import admin
+    urlpatterns.insert(0, path("admin/", admin.site.urls))
+
 handler404 = "auctions.views.handle_not_found"
\ No newline at end of file
@@ -9,8 +9,14 @@ https://docs.djangoproject.com/en/3.0/howto/deployment/wsgi/
 
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'commerce.settings')
 
 application = get_wsgi_application()
+
+# Fill lazy caches before the worker accepts traffic - app is loaded only now
+if settings.WARMUP_ON_START:
+    from auctions.warmup import warmup  # pylint: disable=wrong-import-position
+    warmup()